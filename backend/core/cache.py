@@ -0,0 +1,190 @@
+"""
+Shared in-memory TTL cache for API routes.
+"""
+import asyncio
+import json
+import os
+import time
+
+import orjson
+
+try:
+    import redis
+    HAS_REDIS = True
+except ImportError:
+    HAS_REDIS = False
+
+
+class TTLCache:
+    """Minimal process-wide key/value cache with per-entry expiry"""
+
+    def __init__(self, default_ttl: float):
+        self.default_ttl = default_ttl
+        self._store = {}
+
+    def get(self, key):
+        """Return the cached value, or None if missing or expired"""
+        entry = self._store.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if time.monotonic() >= expires_at:
+            del self._store[key]
+            return None
+        return value
+
+    def set(self, key, value, ttl: float = None):
+        """Cache a value, expiring after ttl seconds (default_ttl if omitted)"""
+        if ttl is None:
+            ttl = self.default_ttl
+        self._store[key] = (value, time.monotonic() + ttl)
+
+
+class DiskTTLCache(TTLCache):
+    """TTLCache that also persists JSON-serializable entries to disk.
+
+    Lets warm data (e.g. daily candles, whose release cadence is much
+    longer than a worker's lifetime) survive process restarts. Entries
+    carry their own wall-clock expiry so short-TTL values are never
+    served stale from disk.
+    """
+
+    def __init__(self, default_ttl: float, cache_dir: str):
+        super().__init__(default_ttl)
+        self.cache_dir = cache_dir
+        self._written_hashes = {}
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key) -> str:
+        safe = "".join(c if c.isalnum() or c in "._-" else "_" for c in str(key))
+        return os.path.join(self.cache_dir, f"{safe}.json")
+
+    def get(self, key):
+        value = super().get(key)
+        if value is not None:
+            return value
+        try:
+            with open(self._path(key), 'rb') as f:
+                entry = orjson.loads(f.read())
+            remaining = entry['expires_at'] - time.time()
+            if remaining > 0:
+                # Re-warm the in-memory cache for the remaining lifetime
+                super().set(key, entry['value'], remaining)
+                return entry['value']
+        except (OSError, ValueError, KeyError):
+            pass
+        return None
+
+    def set(self, key, value, ttl: float = None):
+        super().set(key, value, ttl)
+        if ttl is None:
+            ttl = self.default_ttl
+        try:
+            value_bytes = orjson.dumps(value)
+        except TypeError:
+            return
+        # Skip the disk write when the value hasn't changed since the
+        # last one; the in-memory expiry above is refreshed either way,
+        # and the older on-disk expiry only ever errs toward refetching.
+        value_hash = hash(value_bytes)
+        if self._written_hashes.get(key) == value_hash:
+            return
+        try:
+            with open(self._path(key), 'wb') as f:
+                f.write(b'{"expires_at":' + orjson.dumps(time.time() + ttl) + b',"value":' + value_bytes + b'}')
+            self._written_hashes[key] = value_hash
+        except OSError:
+            pass
+
+
+class RedisTTLCache(TTLCache):
+    """TTLCache backed by Redis so entries are shared across workers.
+
+    Values must be JSON-serializable. Any Redis error degrades to a miss
+    (get) or a no-op (set), so an unavailable server never breaks a
+    request path.
+    """
+
+    def __init__(self, default_ttl: float, client, prefix: str):
+        super().__init__(default_ttl)
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        try:
+            raw = self.client.get(f"{self.prefix}:{key}")
+        except Exception:
+            return None
+        if raw is None:
+            return None
+        try:
+            return json.loads(raw)
+        except ValueError:
+            return None
+
+    def set(self, key, value, ttl: float = None):
+        if ttl is None:
+            ttl = self.default_ttl
+        try:
+            self.client.set(f"{self.prefix}:{key}", json.dumps(value), ex=int(ttl))
+        except Exception:
+            pass
+
+
+def make_shared_cache(default_ttl: float, prefix: str) -> TTLCache:
+    """Build a cache shared across workers when REDIS_URL is configured.
+
+    Falls back to a plain in-process TTLCache when the redis package
+    isn't installed, REDIS_URL is unset, or the server is unreachable.
+    """
+    url = os.getenv("REDIS_URL", "").strip()
+    if url and HAS_REDIS:
+        try:
+            client = redis.Redis.from_url(url, socket_timeout=1)
+            client.ping()
+            return RedisTTLCache(default_ttl, client, prefix)
+        except Exception:
+            pass
+    return TTLCache(default_ttl)
+
+
+async def single_flight(in_flight: dict, key, func, *args):
+    """Coalesce concurrent duplicate computations onto one worker thread.
+
+    The first caller for a key runs func via asyncio.to_thread; callers
+    arriving while it is still running await the same future instead of
+    repeating the work. Results are not cached — once the computation
+    finishes, the next request starts a fresh one. If the leader is
+    cancelled (its client disconnected mid-flight), waiters are not
+    failed with it: one of them retries and becomes the new leader.
+    """
+    while True:
+        existing = in_flight.get(key)
+        if existing is None:
+            break
+        try:
+            return await existing
+        except asyncio.CancelledError:
+            # Re-raise only if *we* were cancelled; a cancelled leader
+            # just means the shared future went away, so retry.
+            if not existing.cancelled():
+                raise
+
+    future = asyncio.get_running_loop().create_future()
+    in_flight[key] = future
+    try:
+        result = await asyncio.to_thread(func, *args)
+    except asyncio.CancelledError:
+        # Our client disconnected. Cancel the shared future instead of
+        # poisoning it, so coalesced waiters retry rather than fail.
+        future.cancel()
+        raise
+    except BaseException as exc:
+        future.set_exception(exc)
+        future.exception()  # mark retrieved in case no one else is waiting
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        del in_flight[key]
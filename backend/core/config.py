@@ -34,6 +34,7 @@ CORS_ORIGINS = [url for url in CORS_ORIGINS if url]  # Remove empty strings
 CACHE_STOCK_DETAILS = 300  # 5 minutes
 CACHE_CANDLES_DAILY = 1800  # 30 minutes
 CACHE_CANDLES_INTRADAY = 30  # 30 seconds
+CACHE_SEARCH_RESULTS = 30  # 30 seconds
 CACHE_MODEL = 600  # 10 minutes
 CACHE_STOCK_LIST = 3600  # 1 hour
 
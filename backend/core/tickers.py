@@ -0,0 +1,22 @@
+"""
+Shared ticker-to-company-name mapping for news lookups.
+"""
+import types
+
+
+# Company names give better news-search results than raw NSE symbols
+TICKER_COMPANY_MAP = types.MappingProxyType({
+    "RELIANCE": "Reliance Industries",
+    "TCS": "Tata Consultancy Services",
+    "INFY": "Infosys",
+    "HDFC": "HDFC Bank",
+    "ICICIBANK": "ICICI Bank",
+    "HDFCBANK": "HDFC Bank",
+    "SBIN": "State Bank of India",
+    "WIPRO": "Wipro"
+})
+
+
+def ticker_to_company(ticker: str) -> str:
+    """Map a ticker (with or without exchange suffix) to its company name"""
+    return TICKER_COMPANY_MAP.get(ticker.split('.')[0], ticker.split('.')[0])
@@ -2,23 +2,65 @@
 Stock Prediction API - Production Version
 Minimal FastAPI application focused on ML predictions.
 """
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from core.config import API_TITLE, API_VERSION
+from fastapi.responses import ORJSONResponse
+from core.cache import TTLCache
+from core.config import API_TITLE, API_VERSION, CACHE_CANDLES_DAILY, CACHE_CANDLES_INTRADAY, CORS_ORIGINS
 from routes import predict, stocks, chat
 
 # Create FastAPI app
-app = FastAPI(title=API_TITLE, version=API_VERSION)
+app = FastAPI(title=API_TITLE, version=API_VERSION, default_response_class=ORJSONResponse)
 
-# Configure CORS
+# ASGI-level response cache for candles: repeat hits are answered with
+# the stored bytes before routing, validation or the handler run at all.
+# Registered before (so wrapped by) CORSMiddleware: cache hits replay the
+# route's own headers and CORS stamps the per-request Allow-Origin on top.
+_INTRADAY_INTERVALS = {'1m', '2m', '5m', '15m', '30m', '60m', '90m', '1h'}
+_candles_response_cache = TTLCache(CACHE_CANDLES_DAILY)
+
+
+@app.middleware("http")
+async def cache_candles_responses(request: Request, call_next):
+    """Serve repeated /stocks/candles requests from cached response bytes."""
+    if request.method != "GET" or request.url.path != "/stocks/candles":
+        return await call_next(request)
+
+    # Key on the canonical parameter triple, not the raw URL: the route
+    # ignores unknown query params, so a raw-URL key would let junk
+    # params mint unlimited distinct entries for the same payload
+    params = request.query_params
+    cache_key = (
+        params.get("ticker", "").strip().upper(),
+        params.get("period", "1mo"),
+        params.get("interval", "1d"),
+    )
+    cached = _candles_response_cache.get(cache_key)
+    if cached is not None:
+        body, headers = cached
+        return Response(content=body, headers=headers)
+
+    response = await call_next(request)
+    if response.status_code == 200:
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        interval = request.query_params.get("interval", "1d")
+        ttl = CACHE_CANDLES_INTRADAY if interval in _INTRADAY_INTERVALS else CACHE_CANDLES_DAILY
+        headers = dict(response.headers)
+        _candles_response_cache.set(cache_key, (body, headers), ttl)
+        return Response(content=body, status_code=response.status_code, headers=headers)
+    return response
+
+
+# Configure CORS (added after the cache middleware so it runs outermost)
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=CORS_ORIGINS,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "OPTIONS"],
+    allow_headers=["Content-Type", "Authorization"],
 )
 
+
 # Include routes
 app.include_router(predict.router, tags=["prediction"])
 app.include_router(stocks.router, tags=["stocks"])
@@ -38,10 +80,26 @@ def health_check():
 @app.on_event("startup")
 async def startup_event():
     """Startup event."""
+    # Warm the stock database and search indexes so the first search
+    # request doesn't pay the load-and-normalize cost
+    stocks.get_search_index()
+    stocks.get_ticker_index()
     print("✅ Signalist API ready!")
 
 
 if __name__ == "__main__":
+    import os
     import uvicorn
     from core.config import API_HOST, API_PORT
-    uvicorn.run(app, host=API_HOST, port=API_PORT)
+    # loop/http "auto" picks uvloop+httptools when installed (they're in
+    # requirements.txt) and falls back to asyncio+h11 otherwise. Workers
+    # scale the blocking ML endpoint across cores; note the in-process
+    # TTL caches become per-worker, which is fine for TTL-based data.
+    uvicorn.run(
+        "main:app",
+        host=API_HOST,
+        port=API_PORT,
+        workers=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)),
+        loop="auto",
+        http="auto",
+    )
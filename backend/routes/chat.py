@@ -2,7 +2,7 @@
 RAG Chat Route
 Allows users to chat with the AI about specific stocks using RAG context.
 """
-from fastapi import APIRouter, HTTPException, Body
+from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import Optional, List, Dict
 import os
@@ -10,6 +10,8 @@ import requests
 import google.generativeai as genai
 from dotenv import load_dotenv
 
+from core.tickers import ticker_to_company
+
 router = APIRouter()
 load_dotenv()
 
@@ -46,16 +48,7 @@ async def chat_with_stock(request: ChatRequest):
         if newsdata_key and newsdata_key != "your_newsdata_api_key_here":
             try:
                 # Map ticker to company name
-                ticker_map = {
-                    "RELIANCE": "Reliance Industries",
-                    "TCS": "Tata Consultancy Services",
-                    "INFY": "Infosys",
-                    "HDFC": "HDFC Bank",
-                    "ICICIBANK": "ICICI Bank",
-                    "SBIN": "State Bank of India",
-                    "WIPRO": "Wipro"
-                }
-                company = ticker_map.get(request.ticker.split('.')[0], request.ticker)
+                company = ticker_to_company(request.ticker)
                 
                 # Fetch news
                 response = requests.get(
@@ -1,17 +1,36 @@
 """
 Signalist prediction routes - Production version.
 """
+import asyncio
+
 from fastapi import APIRouter, HTTPException, Query
-from typing import Optional
+from pydantic import BaseModel
+from typing import List, Optional
 from datetime import datetime
+from core.cache import single_flight
 from services.enhanced_trading_signals import predict as enhanced_predict
 from services.news_signal_service import get_news_signal_features
 
 router = APIRouter()
 
+# In-flight predictions: a spike of identical requests runs the model once
+_predict_in_flight = {}
+
+
+# Cap per-request fan-out: each ticker costs a news fetch plus a model
+# run in the shared thread pool, so an unbounded list could monopolize
+# the executor that /predict and the stock routes also rely on
+MAX_BATCH_TICKERS = 20
+
+
+class BatchPredictRequest(BaseModel):
+    tickers: List[str]
+    owns_stock: bool = False
+    use_rag: bool = True
+
 
 @router.get("/predict")
-def predict_stock(
+async def predict_stock(
     ticker: Optional[str] = Query(None, description="Stock ticker like RELIANCE.NS"),
     owns_stock: bool = Query(False, description="Whether you currently own this stock"),
     use_rag: bool = Query(True, description="Whether to use RAG news features")
@@ -27,17 +46,57 @@ def predict_stock(
     ticker = ticker.strip().upper()
     
     try:
-        # Fetch RAG news features if enabled
-        rag_features = None
-        if use_rag:
-            today = datetime.now().strftime("%Y-%m-%d")
-            rag_features = get_news_signal_features(ticker, today)
-        
-        prediction = enhanced_predict(ticker, owns_stock=owns_stock, rag_features=rag_features)
-        return prediction
+        # News fetch + model inference block for seconds; run them off
+        # the event loop so concurrent requests keep being accepted, and
+        # coalesce concurrent duplicates onto a single model run
+        key = (ticker, owns_stock, use_rag)
+        return await single_flight(_predict_in_flight, key, _predict_sync, ticker, owns_stock, use_rag)
     
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
+
+
+def _predict_sync(ticker: str, owns_stock: bool, use_rag: bool):
+    """Blocking prediction pipeline, run in a worker thread"""
+    # Fetch RAG news features if enabled
+    rag_features = None
+    if use_rag:
+        today = datetime.now().strftime("%Y-%m-%d")
+        rag_features = get_news_signal_features(ticker, today)
+    
+    return enhanced_predict(ticker, owns_stock=owns_stock, rag_features=rag_features)
+
+
+@router.post("/predict/batch")
+async def predict_batch(request: BatchPredictRequest):
+    """
+    Get trading signals for several tickers in one request.
+    Predictions run concurrently in worker threads; failures for one
+    ticker are reported per-ticker instead of failing the whole batch.
+    """
+    if not request.tickers:
+        raise HTTPException(status_code=400, detail="At least one ticker is required")
+
+    if len(request.tickers) > MAX_BATCH_TICKERS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_BATCH_TICKERS} tickers per batch request"
+        )
+
+    # Dedupe up front (order-preserving): duplicates would collapse into
+    # one key in the response dict anyway, so don't predict them twice
+    tickers = list(dict.fromkeys(t.strip().upper() for t in request.tickers))
+    
+    async def predict_one(ticker: str):
+        try:
+            key = (ticker, request.owns_stock, request.use_rag)
+            return await single_flight(_predict_in_flight, key, _predict_sync,
+                                       ticker, request.owns_stock, request.use_rag)
+        except Exception as e:
+            return {"error": str(e)}
+    
+    results = await asyncio.gather(*(predict_one(t) for t in tickers))
+    return dict(zip(tickers, results))
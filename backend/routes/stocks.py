@@ -2,16 +2,28 @@
 Stock data routes for frontend compatibility.
 Uses Finnhub as primary data source with yfinance as fallback.
 """
-from fastapi import APIRouter, Query, HTTPException
-import yfinance as yf
+from fastapi import APIRouter, Query, HTTPException, Response
+from fastapi.responses import StreamingResponse
 import pandas as pd
-import json
+import orjson
 import os
 import requests
 import time
 from typing import Optional
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+import asyncio
+import heapq
+import mmap
+import pickle
+import random
+import sys
+import types
+from enum import Enum
 from functools import lru_cache
 from datetime import datetime, timedelta
+from core.cache import TTLCache, DiskTTLCache, make_shared_cache, single_flight
+from core.config import CACHE_STOCK_DETAILS, CACHE_CANDLES_DAILY, CACHE_CANDLES_INTRADAY, CACHE_SEARCH_RESULTS
 
 router = APIRouter()
 
@@ -19,38 +31,158 @@ router = APIRouter()
 FINNHUB_API_KEY = os.getenv("FINNHUB_API_KEY", "")
 FINNHUB_BASE_URL = "https://finnhub.io/api/v1"
 
-# Simple in-memory cache with TTL
-_stock_details_cache = {}
-_stock_candles_cache = {}
-CACHE_TTL_SECONDS = 300  # 5 minutes cache
+# Shared pool for fanning out independent upstream API calls
+_fetch_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="stock-fetch")
 
+# Bound on in-flight fan-out tasks: when the pool is saturated the
+# caller runs the task itself instead of growing the pool's queue
+_fetch_slots = threading.Semaphore(16)
 
-def get_cached_stock_details(ticker: str):
-    """Get cached stock details if not expired"""
-    if ticker in _stock_details_cache:
-        data, timestamp = _stock_details_cache[ticker]
-        if time.time() - timestamp < CACHE_TTL_SECONDS:
-            return data
-    return None
 
+def submit_bounded(func, *args):
+    """Submit work to the fetch pool with caller-runs back-pressure.
+
+    Returns a Future either way; on overflow the task runs synchronously
+    on the submitting thread, so slow upstreams throttle new submissions
+    naturally instead of piling futures into an unbounded queue.
+    """
+    if _fetch_slots.acquire(blocking=False):
+        future = _fetch_pool.submit(func, *args)
+        future.add_done_callback(lambda _: _fetch_slots.release())
+        return future
+    
+    future = Future()
+    try:
+        future.set_result(func(*args))
+    except BaseException as exc:
+        future.set_exception(exc)
+    return future
 
-def set_cached_stock_details(ticker: str, data: dict):
-    """Cache stock details with timestamp"""
-    _stock_details_cache[ticker] = (data, time.time())
 
+# Shared pooled HTTP session: keeps TLS connections to Finnhub and Yahoo
+# alive across requests instead of paying a fresh handshake per call
+_http = requests.Session()
+_http.mount("https://", requests.adapters.HTTPAdapter(pool_connections=20, pool_maxsize=20))
+
+# Process-wide TTL caches, sized from core.config so intraday candles
+# expire quickly while daily candles and details live longer
+_stock_details_cache = make_shared_cache(CACHE_STOCK_DETAILS, "details")
+_stock_search_cache = make_shared_cache(CACHE_SEARCH_RESULTS, "search")
+# Serialized candle payload bytes, so cache hits skip re-running orjson.dumps
+_candles_payload_cache = TTLCache(CACHE_CANDLES_DAILY)
+# In-flight details fetches, so a burst for one ticker hits upstream once
+_details_in_flight = {}
+# Negative cache: tickers recently confirmed invalid/delisted, so repeat
+# lookups fail fast instead of burning upstream round-trips
+_invalid_ticker_cache = TTLCache(600)
+# Candles persist to disk so daily data survives worker restarts
+_stock_candles_cache = DiskTTLCache(
+    CACHE_CANDLES_DAILY,
+    os.path.join(os.path.dirname(__file__), "..", "data", "cache", "candles")
+)
+
+
+# Token bucket for yfinance calls: caps the sustained request rate while
+# still letting a short burst through, unlike fixed call spacing which
+# conflates concurrency with rate
+YF_RATE_PER_SEC = 2.0
+YF_BURST_CAPACITY = 5.0
+_yf_tokens = YF_BURST_CAPACITY
+_yf_last_refill = 0.0
+_yf_bucket_lock = threading.Lock()
+# Socket-level timeout for yfinance history fetches so a stalled Yahoo
+# connection fails fast instead of hanging the worker thread
+YF_REQUEST_TIMEOUT = 10
+
+# Circuit breaker: once Yahoo rate-limits us, skip the yfinance fallback
+# for a cool-down window instead of queueing more doomed requests
+YF_DOWN_WINDOW = 60.0
+_yf_down_until = 0.0
+
+
+def yfinance_available() -> bool:
+    """Check the Yahoo availability gate (a single monotonic clock read)"""
+    return time.monotonic() >= _yf_down_until
+
+
+def mark_yfinance_down():
+    """Open the circuit breaker after a rate-limit response from Yahoo"""
+    global _yf_down_until
+    _yf_down_until = time.monotonic() + YF_DOWN_WINDOW
+
+
+class YFinanceCooldownError(Exception):
+    """Fast-fail raised while the circuit breaker is open.
+
+    A dedicated type so the catch-all rate-limit handlers can answer 429
+    without calling mark_yfinance_down() again — re-arming the breaker
+    on every rejected request would hold it open forever under steady
+    polling, since each rejection restarts the cool-down window.
+    """
+
+
+YF_RETRY_ATTEMPTS = 3
+
+
+def yf_call_with_backoff(func, *args, **kwargs):
+    """Run a yfinance call, retrying rate-limit failures with backoff + jitter.
+
+    Only rate-limit style errors are retried; anything else propagates
+    immediately. The jitter keeps a burst of workers from retrying in
+    lock-step against Yahoo's limiter.
+    """
+    delay = 0.5
+    for attempt in range(YF_RETRY_ATTEMPTS):
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            error_msg = str(e)
+            rate_limited = "429" in error_msg or "Rate" in error_msg or "Too Many" in error_msg
+            if not rate_limited or attempt == YF_RETRY_ATTEMPTS - 1:
+                raise
+            time.sleep(delay + random.uniform(0, delay))
+            delay *= 2
 
-def get_cached_candles(cache_key: str):
-    """Get cached candles if not expired"""
-    if cache_key in _stock_candles_cache:
-        data, timestamp = _stock_candles_cache[cache_key]
-        if time.time() - timestamp < CACHE_TTL_SECONDS:
-            return data
-    return None
 
+@lru_cache(maxsize=128)
+def _ticker_for_bucket(symbol: str, bucket: int):
+    import yfinance as yf
+    return yf.Ticker(symbol)
 
-def set_cached_candles(cache_key: str, data: dict):
-    """Cache candles with timestamp"""
-    _stock_candles_cache[cache_key] = (data, time.time())
+
+def get_ticker(symbol: str):
+    """Return a pooled yf.Ticker for a symbol.
+
+    yfinance is imported lazily here because it is only needed on the
+    fallback path. Ticker objects memoize .info and metadata for their
+    whole lifetime, so the pool key includes an hourly bucket: within
+    the hour repeated lookups reuse one object (collapsing its internal
+    HTTP requests), and after it the entry rotates so the memoized info
+    can never grow more than an hour stale.
+    """
+    return _ticker_for_bucket(symbol, int(time.time()) // 3600)
+
+
+def throttle_yfinance():
+    """Block until the token bucket grants a yfinance call.
+
+    The bucket refills at YF_RATE_PER_SEC and holds at most
+    YF_BURST_CAPACITY tokens, so isolated requests go straight through
+    while sustained load is smoothed to the configured rate across all
+    worker threads.
+    """
+    global _yf_tokens, _yf_last_refill
+    while True:
+        with _yf_bucket_lock:
+            now = time.monotonic()
+            _yf_tokens = min(YF_BURST_CAPACITY,
+                             _yf_tokens + (now - _yf_last_refill) * YF_RATE_PER_SEC)
+            _yf_last_refill = now
+            if _yf_tokens >= 1.0:
+                _yf_tokens -= 1.0
+                return
+            wait = (1.0 - _yf_tokens) / YF_RATE_PER_SEC
+        time.sleep(wait)
 
 
 # ============ FINNHUB API FUNCTIONS ============
@@ -62,9 +194,9 @@ def finnhub_get_quote(symbol: str) -> Optional[dict]:
     try:
         url = f"{FINNHUB_BASE_URL}/quote"
         params = {"symbol": symbol, "token": FINNHUB_API_KEY}
-        response = requests.get(url, params=params, timeout=5)
+        response = _http.get(url, params=params, timeout=5)
         response.raise_for_status()
-        data = response.json()
+        data = orjson.loads(response.content)
         # Check if we got valid data (c=0 means no data)
         if data.get("c", 0) > 0:
             return data
@@ -81,9 +213,9 @@ def finnhub_get_company_profile(symbol: str) -> Optional[dict]:
     try:
         url = f"{FINNHUB_BASE_URL}/stock/profile2"
         params = {"symbol": symbol, "token": FINNHUB_API_KEY}
-        response = requests.get(url, params=params, timeout=5)
+        response = _http.get(url, params=params, timeout=5)
         response.raise_for_status()
-        data = response.json()
+        data = orjson.loads(response.content)
         if data.get("name"):
             return data
         return None
@@ -107,9 +239,9 @@ def finnhub_get_candles(symbol: str, resolution: str, from_ts: int, to_ts: int)
             "to": to_ts,
             "token": FINNHUB_API_KEY
         }
-        response = requests.get(url, params=params, timeout=10)
+        response = _http.get(url, params=params, timeout=10)
         response.raise_for_status()
-        data = response.json()
+        data = orjson.loads(response.content)
         # Check if we got valid data
         if data.get("s") == "ok" and data.get("c"):
             return data
@@ -126,9 +258,9 @@ def finnhub_get_basic_financials(symbol: str) -> Optional[dict]:
     try:
         url = f"{FINNHUB_BASE_URL}/stock/metric"
         params = {"symbol": symbol, "metric": "all", "token": FINNHUB_API_KEY}
-        response = requests.get(url, params=params, timeout=5)
+        response = _http.get(url, params=params, timeout=5)
         response.raise_for_status()
-        data = response.json()
+        data = orjson.loads(response.content)
         if data.get("metric"):
             return data.get("metric")
         return None
@@ -137,115 +269,299 @@ def finnhub_get_basic_financials(symbol: str) -> Optional[dict]:
         return None
 
 
+@lru_cache(maxsize=4096)
+def normalize_ticker(ticker: str) -> str:
+    """Default bare tickers to the NSE suffix (pure, so memoized forever)"""
+    if ticker.endswith('.NS') or ticker.endswith('.BO'):
+        return ticker
+    return f"{ticker}.NS"
+
+
 def convert_ticker_for_finnhub(ticker: str) -> str:
     """Convert NSE ticker to Finnhub format (e.g., TATASTEEL.NS -> TATASTEEL.NS)"""
     # Finnhub uses the same format for Indian stocks
     return ticker
 
 
+# Static period/interval lookup tables, built once at import instead of per call
+class CandlePeriod(str, Enum):
+    """Accepted period values for /stocks/candles, rejected by pydantic before the handler runs"""
+    ONE_DAY = "1d"
+    FIVE_DAYS = "5d"
+    ONE_MONTH = "1mo"
+    THREE_MONTHS = "3mo"
+    SIX_MONTHS = "6mo"
+    ONE_YEAR = "1y"
+    TWO_YEARS = "2y"
+    FIVE_YEARS = "5y"
+    TEN_YEARS = "10y"
+    YTD = "ytd"
+    MAX = "max"
+
+
+class CandleInterval(str, Enum):
+    """Accepted interval values for /stocks/candles"""
+    ONE_MINUTE = "1m"
+    TWO_MINUTES = "2m"
+    FIVE_MINUTES = "5m"
+    FIFTEEN_MINUTES = "15m"
+    THIRTY_MINUTES = "30m"
+    SIXTY_MINUTES = "60m"
+    NINETY_MINUTES = "90m"
+    ONE_HOUR = "1h"
+    ONE_DAY = "1d"
+    FIVE_DAYS = "5d"
+    ONE_WEEK = "1wk"
+    ONE_MONTH = "1mo"
+    THREE_MONTHS = "3mo"
+
+
+PERIOD_MAP = types.MappingProxyType({
+    "1d": timedelta(days=1),
+    "5d": timedelta(days=5),
+    "1mo": timedelta(days=30),
+    "3mo": timedelta(days=90),
+    "6mo": timedelta(days=180),
+    "1y": timedelta(days=365),
+    "2y": timedelta(days=730),
+    "5y": timedelta(days=1825),
+    "10y": timedelta(days=3650),
+    "max": timedelta(days=7300),
+})
+
+INTERVAL_MAP = types.MappingProxyType({
+    "1m": "1",
+    "5m": "5",
+    "15m": "15",
+    "30m": "30",
+    "60m": "60",
+    "1h": "60",
+    "1d": "D",
+    "1wk": "W",
+    "1mo": "M",
+})
+
+
+# Period lengths as plain epoch seconds, so the hot path is integer
+# arithmetic instead of datetime/timedelta object construction
+PERIOD_SECONDS = types.MappingProxyType({
+    period: int(delta.total_seconds()) for period, delta in PERIOD_MAP.items()
+})
+
+
 def period_to_timestamps(period: str) -> tuple:
     """Convert period string to from/to timestamps"""
-    now = datetime.now()
-    to_ts = int(now.timestamp())
-    
-    period_map = {
-        "1d": timedelta(days=1),
-        "5d": timedelta(days=5),
-        "1mo": timedelta(days=30),
-        "3mo": timedelta(days=90),
-        "6mo": timedelta(days=180),
-        "1y": timedelta(days=365),
-        "2y": timedelta(days=730),
-        "5y": timedelta(days=1825),
-        "10y": timedelta(days=3650),
-        "ytd": timedelta(days=(now - datetime(now.year, 1, 1)).days),
-        "max": timedelta(days=7300),
-    }
-    
-    delta = period_map.get(period, timedelta(days=30))
-    from_ts = int((now - delta).timestamp())
-    
+    now = time.time()
+    to_ts = int(now)
+
+    if period == "ytd":
+        year_start = datetime(datetime.now().year, 1, 1)
+        from_ts = int(year_start.timestamp())
+    else:
+        from_ts = to_ts - PERIOD_SECONDS.get(period, PERIOD_SECONDS["1mo"])
+
     return from_ts, to_ts
 
 
 def interval_to_finnhub_resolution(interval: str) -> str:
     """Convert yfinance interval to Finnhub resolution"""
-    interval_map = {
-        "1m": "1",
-        "5m": "5",
-        "15m": "15",
-        "30m": "30",
-        "60m": "60",
-        "1h": "60",
-        "1d": "D",
-        "1wk": "W",
-        "1mo": "M",
-    }
-    return interval_map.get(interval, "D")
+    return INTERVAL_MAP.get(interval, "D")
+
+
+# yfinance info fields copied verbatim into the details response (response
+# key == info key). Kept as one tuple so the response builder can do a
+# single comprehension instead of ~90 inline lookups.
+YF_INFO_PASSTHROUGH = (
+    # 52 Week Range
+    "fiftyTwoWeekHigh", "fiftyTwoWeekLow", "fiftyTwoWeekChangePercent",
+    "fiftyTwoWeekHighChange", "fiftyTwoWeekHighChangePercent",
+    "fiftyTwoWeekLowChange", "fiftyTwoWeekLowChangePercent", "fiftyTwoWeekRange",
+    # Volume
+    "averageVolume", "averageVolume10days", "averageDailyVolume10Day",
+    "averageDailyVolume3Month",
+    # Moving Averages
+    "fiftyDayAverage", "fiftyDayAverageChange", "fiftyDayAverageChangePercent",
+    "twoHundredDayAverage", "twoHundredDayAverageChange",
+    "twoHundredDayAverageChangePercent",
+    # Market Cap & Valuation
+    "marketCap", "enterpriseValue", "enterpriseToRevenue", "enterpriseToEbitda",
+    # Ratios
+    "trailingPE", "forwardPE", "priceToBook", "priceToSalesTrailing12Months", "beta",
+    # Earnings & Dividends
+    "epsCurrentYear", "exDividendDate", "payoutRatio", "fiveYearAvgDividendYield",
+    # Profitability
+    "profitMargins", "operatingMargins", "grossMargins", "ebitdaMargins",
+    "revenueGrowth", "earningsGrowth", "earningsQuarterlyGrowth",
+    # Financial Health
+    "totalRevenue", "revenuePerShare", "totalCash", "totalCashPerShare",
+    "totalDebt", "debtToEquity", "currentRatio", "quickRatio",
+    "returnOnAssets", "returnOnEquity", "freeCashflow", "operatingCashflow",
+    "ebitda", "grossProfits", "netIncomeToCommon",
+    # Business Info
+    "sectorKey", "industryKey", "fullTimeEmployees", "website", "irWebsite",
+    "country", "city", "address1", "address2", "zip", "phone", "fax",
+    # Description
+    "longBusinessSummary", "businessSummary",
+    # Trading Info
+    "fullExchangeName", "exchangeTimezoneName", "exchangeTimezoneShortName",
+    # Analyst Recommendations
+    "targetHighPrice", "targetLowPrice", "targetMeanPrice", "targetMedianPrice",
+    "recommendationKey", "recommendationMean", "numberOfAnalystOpinions",
+    "averageAnalystRating",
+    # Additional Metrics
+    "sharesOutstanding", "impliedSharesOutstanding", "floatShares",
+    "heldPercentInsiders", "heldPercentInstitutions", "bookValue",
+    "lastDividendValue", "lastDividendDate", "lastSplitDate", "lastSplitFactor",
+    # Risk Metrics
+    "auditRisk", "boardRisk", "compensationRisk", "shareHolderRightsRisk",
+    "overallRisk",
+    # Historical Highs/Lows
+    "allTimeHigh", "allTimeLow",
+    # Bid/Ask
+    "bid", "ask", "bidSize", "askSize",
+)
+
+
+def _intern_stock_fields(stocks):
+    """Intern the heavily repeated string fields of the stock records.
+
+    Sector and exchange values repeat across most of the database, and
+    symbols are compared constantly in the indexes; interning collapses
+    the duplicates to one heap object each and lets later == checks hit
+    the pointer-equality fast path. Applied on both load paths, since
+    unpickled strings come back un-interned.
+    """
+    for stock in stocks:
+        for key in ("symbol", "sector", "exchange"):
+            value = stock.get(key)
+            if type(value) is str:
+                stock[key] = sys.intern(value)
+    return stocks
 
 
 # Load fallback stock database
 def load_stock_database():
-    """Load all NSE stocks from JSON file as fallback"""
+    """Load all NSE stocks from disk as fallback.
+
+    A pickle sidecar (written on first load, invalidated by the JSON
+    file's mtime) skips re-parsing the multi-thousand-entry JSON on
+    later cold starts; the JSON itself is parsed with orjson.
+    """
     json_path = os.path.join(os.path.dirname(__file__), "..", "data", "stocks_nse.json")
+    pickle_path = json_path + ".pkl"
+    
+    try:
+        json_mtime = os.path.getmtime(json_path)
+    except OSError:
+        return []
+    
+    try:
+        if os.path.getmtime(pickle_path) >= json_mtime:
+            with open(pickle_path, 'rb') as f:
+                return _intern_stock_fields(pickle.load(f))
+    except (OSError, pickle.UnpicklingError, EOFError):
+        pass
+    
     try:
-        with open(json_path, 'r') as f:
-            return json.load(f)
+        # orjson parses straight from a memoryview over the mmap, so the
+        # file is never copied into a Python bytes object or decoded to str
+        with open(json_path, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            mv = memoryview(mm)
+            try:
+                stocks = orjson.loads(mv)
+            finally:
+                mv.release()
+                mm.close()
     except FileNotFoundError:
         return []
+    
+    # Dedupe by symbol (first occurrence wins) so multi-source merges in
+    # the JSON can't inflate every downstream scan and index
+    deduped = {}
+    for stock in stocks:
+        deduped.setdefault(stock.get("symbol", "").upper(), stock)
+    stocks = _intern_stock_fields(list(deduped.values()))
+
+    try:
+        with open(pickle_path, 'wb') as f:
+            pickle.dump(stocks, f, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError:
+        pass
+    
+    return stocks
+
+# Fallback stock database, loaded lazily on first use so module import
+# (and app startup) doesn't pay the JSON parse cost
+@lru_cache(maxsize=1)
+def get_stock_database():
+    """Return the fallback stock database, loading it on first access"""
+    return load_stock_database()
+
+
+@lru_cache(maxsize=1024)
+def _search_stocks_api_cached(query: str, limit: int, bucket: int) -> tuple:
+    """Minute-bucketed memo of the Yahoo Finance search call.
+
+    The bucket argument rotates the cache key every 60 seconds, so the
+    LRU behaves like a TTL cache without any eviction thread. Upstream
+    failures raise (lru_cache never caches exceptions), so a transient
+    outage isn't pinned for the rest of the minute.
+    """
+    # Yahoo Finance search endpoint
+    url = "https://query2.finance.yahoo.com/v1/finance/search"
+    params = {
+        "q": query,
+        "quotesCount": limit,
+        "newsCount": 0,
+        "listsCount": 0,
+        "quotesQueryId": "tss_match_phrase_query"
+    }
+    headers = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+    }
+
+    response = _http.get(url, params=params, headers=headers, timeout=3)
+    response.raise_for_status()
+    data = orjson.loads(response.content)
+
+    stocks = []
+    quotes = data.get("quotes", [])
+
+    for quote in quotes:
+        symbol = quote.get("symbol", "")
 
-# Cache the stock database for fallback
-STOCK_DATABASE = load_stock_database()
+        # Filter for Indian stocks (NSE/BSE)
+        if ".NS" in symbol or ".BO" in symbol:
+            exchange = "NSE" if ".NS" in symbol else "BSE"
+
+            stocks.append({
+                "symbol": symbol,
+                "name": quote.get("longname") or quote.get("shortname") or symbol,
+                "sector": quote.get("sector", quote.get("industry", "Unknown")),
+                "exchange": exchange,
+                "quoteType": quote.get("quoteType", "EQUITY")
+            })
+
+    return tuple(stocks)
 
 
 def search_stocks_api(query: str, limit: int = 8):
     """
     Real-time API search using Yahoo Finance API.
     Searches through ALL Indian stocks dynamically.
+    Repeated queries within the same minute are served from the LRU memo.
     """
     if not query:
         # Return top popular stocks when no query
-        return STOCK_DATABASE[:limit]
+        return get_stock_database()[:limit]
     
     try:
-        # Yahoo Finance search endpoint
-        url = "https://query2.finance.yahoo.com/v1/finance/search"
-        params = {
-            "q": query,
-            "quotesCount": limit,
-            "newsCount": 0,
-            "listsCount": 0,
-            "quotesQueryId": "tss_match_phrase_query"
-        }
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-        }
-        
-        response = requests.get(url, params=params, headers=headers, timeout=3)
-        response.raise_for_status()
-        data = response.json()
-        
-        stocks = []
-        quotes = data.get("quotes", [])
-        
-        for quote in quotes:
-            symbol = quote.get("symbol", "")
-            
-            # Filter for Indian stocks (NSE/BSE)
-            if ".NS" in symbol or ".BO" in symbol:
-                exchange = "NSE" if ".NS" in symbol else "BSE"
-                
-                stocks.append({
-                    "symbol": symbol,
-                    "name": quote.get("longname") or quote.get("shortname") or symbol,
-                    "sector": quote.get("sector", quote.get("industry", "Unknown")),
-                    "exchange": exchange,
-                    "quoteType": quote.get("quoteType", "EQUITY")
-                })
+        stocks = _search_stocks_api_cached(query.lower().strip(), limit, int(time.time()) // 60)
         
         # If API returns results, use them
         if stocks:
-            return stocks[:limit]
+            return list(stocks[:limit])
         
         # Fallback to local database search if API returns no results
         return search_stocks_local(query, limit)
@@ -256,23 +572,100 @@ def search_stocks_api(query: str, limit: int = 8):
         return search_stocks_local(query, limit)
 
 
+@lru_cache(maxsize=1)
+def get_search_index():
+    """Pre-normalized rows for local search, built once per process.
+
+    Each row carries the lowercased symbol (exchange suffix stripped),
+    name, pre-split name words and sector, so queries don't re-lowercase
+    the entire database on every keystroke.
+    """
+    index = []
+    for stock in get_stock_database():
+        name_lower = stock["name"].lower()
+        index.append((
+            stock["symbol"].lower().replace(".ns", "").replace(".bo", ""),
+            name_lower,
+            name_lower.split(),
+            stock.get("sector", "").lower(),
+            stock
+        ))
+    return index
+
+
+@lru_cache(maxsize=1)
+def get_prefix_index():
+    """First-character shards of the search index, built once per process.
+
+    Each row is bucketed (with its database position) under the first
+    character of its symbol and of every word in its name, so a
+    single-word prefix query only scans its own bucket instead of the
+    whole database. Substring and sector matches can live outside the
+    bucket, so callers fall back to the full index whenever the bucket
+    alone can't fill the result set with prefix-grade matches.
+    """
+    shards = {}
+    for position, row in enumerate(get_search_index()):
+        symbol_lower, _, name_words, _, _ = row
+        firsts = {symbol_lower[:1]} | {word[:1] for word in name_words}
+        firsts.discard("")
+        for char in firsts:
+            shards.setdefault(char, []).append((position, row))
+    return shards
+
+
+@lru_cache(maxsize=1)
+def get_ticker_index():
+    """O(1) lowercased-symbol -> stock lookup over the local database"""
+    return {symbol_lower: stock for symbol_lower, _, _, _, stock in get_search_index()}
+
+
+def get_stock_by_ticker(ticker: str):
+    """Exact-symbol lookup (suffix-insensitive), or None if unknown"""
+    key = ticker.lower().strip().replace(".ns", "").replace(".bo", "")
+    return get_ticker_index().get(key)
+
+
 def search_stocks_local(query: str, limit: int = 8):
     """
     Fallback local search with word-by-word matching.
+    Results are memoized per (query, limit) since the database is static
+    within a process.
     """
     if not query:
-        return STOCK_DATABASE[:limit]
+        return get_stock_database()[:limit]
     
-    query_lower = query.lower().strip()
+    return _search_stocks_local_scored(query.lower().strip(), limit)
+
+
+@lru_cache(maxsize=512)
+def _search_stocks_local_scored(query_lower: str, limit: int):
+    """Scored scan over the pre-normalized index (memoized)"""
     search_words = query_lower.split()
-    
+
+    # Single-word prefix fast path: every prefix-grade match (symbol or
+    # name word starts with the query) lives in the first-character
+    # shard and scores >= 90, while substring/sector matches cap at 80.
+    # So when the shard alone fills the limit with prefix-grade hits,
+    # scanning the rest of the database can't change the top results.
+    if len(search_words) == 1:
+        shard = get_prefix_index().get(query_lower[0], ())
+        prefix_hits = [hit for hit in _score_rows(shard, search_words) if hit[0] >= 90]
+        if len(prefix_hits) >= limit:
+            return [stock for _, _, _, stock in heapq.nlargest(limit, prefix_hits)]
+
+    scored_stocks = _score_rows(enumerate(get_search_index()), search_words)
+
+    # Partial-sort: only the top `limit` results are needed, so an
+    # O(N log limit) heap selection replaces the full sort
+    return [stock for _, _, _, stock in heapq.nlargest(limit, scored_stocks)]
+
+
+def _score_rows(rows, search_words):
+    """Score (position, row) pairs against the query words"""
     scored_stocks = []
-    
-    for stock in STOCK_DATABASE:
-        name_lower = stock["name"].lower()
-        symbol_lower = stock["symbol"].lower().replace(".ns", "").replace(".bo", "")
-        sector_lower = stock.get("sector", "").lower()
-        
+
+    for position, (symbol_lower, name_lower, name_words, sector_lower, stock) in rows:
         score = 0
         matched_words = 0
         
@@ -295,7 +688,7 @@ def search_stocks_local(query: str, limit: int = 8):
                 score += 70
                 matched_words += 1
             # Any word in name starts with search word
-            elif any(name_word.startswith(word) for name_word in name_lower.split()):
+            elif any(name_word.startswith(word) for name_word in name_words):
                 score += 60
                 matched_words += 1
             # Name contains word
@@ -313,46 +706,79 @@ def search_stocks_local(query: str, limit: int = 8):
             if matched_words == len(search_words):
                 score += 30
             
-            scored_stocks.append({
-                "stock": stock,
-                "score": score,
-                "matched_words": matched_words
-            })
-    
-    # Sort by score (descending), then by matched words (descending)
-    scored_stocks.sort(key=lambda x: (x["score"], x["matched_words"]), reverse=True)
-    
-    # Return top results
-    return [item["stock"] for item in scored_stocks[:limit]]
+            # Materialized sort key: tuples compare natively, so the heap
+            # below never calls back into Python for a key. -position
+            # breaks score ties by database order without comparing dicts.
+            scored_stocks.append((score, matched_words, -position, stock))
+
+    return scored_stocks
+
+
+@lru_cache(maxsize=32)
+def _default_stocks_response(limit: int) -> dict:
+    """Frozen no-search /stocks payload, built once per limit.
+
+    The popular-stocks list never changes within a process, so the
+    slice-and-wrap work is done once instead of on every request.
+    """
+    stocks = get_stock_database()[:limit]
+    return {
+        "stocks": stocks,
+        "total": len(stocks)
+    }
 
 
 @router.get("/stocks")
 def get_stocks(search: Optional[str] = Query(None), limit: int = Query(8)):
     """Get stock list with real-time API search"""
     
-    if search:
-        # Use real-time API search
-        stocks = search_stocks_api(search, limit)
-    else:
+    if not search:
         # Return popular/top stocks when no search
-        stocks = STOCK_DATABASE[:limit]
+        return _default_stocks_response(limit)
     
-    return {
+    # Normalize once; every layer below (index lookup, cache key, memoized
+    # API search) reuses the same lowercased form
+    query = search.lower().strip()
+    
+    # Exact ticker queries skip the remote search entirely: one hash
+    # lookup against the local index instead of an upstream round-trip
+    exact = get_stock_by_ticker(query)
+    if exact is not None:
+        return {"stocks": [exact], "total": 1}
+    
+    # Serve repeated searches straight from the TTL cache, whichever
+    # backend (Yahoo API or local fallback) produced them
+    cache_key = f"{query}_{limit}"
+    cached = _stock_search_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    # Use real-time API search
+    stocks = search_stocks_api(query, limit)
+    
+    response = {
         "stocks": stocks,
         "total": len(stocks)
     }
+    _stock_search_cache.set(cache_key, response)
+    return response
 
 
 @router.get("/stocks/details")
-def get_stock_details(ticker: str = Query(...)):
+async def get_stock_details(ticker: str = Query(...)):
     """Get comprehensive real-time stock details using Finnhub (primary) or yfinance (fallback)"""
+    # Offload the blocking upstream calls so the event loop stays free;
+    # concurrent requests for the same ticker share one fetch
+    return await single_flight(_details_in_flight, ticker, _get_stock_details_sync, ticker)
+
+
+def _get_stock_details_sync(ticker: str):
     try:
         # Clean ticker - allow .BO for BSE, default to .NS if no suffix
-        if not ticker.endswith('.NS') and not ticker.endswith('.BO'):
-            ticker = f"{ticker}.NS"
+        ticker = normalize_ticker(ticker)
         
         # Check cache first
-        cached = get_cached_stock_details(ticker)
+        cached = _stock_details_cache.get(ticker)
         if cached:
             print(f"Returning cached details for {ticker}")
             return cached
@@ -365,9 +791,14 @@ def get_stock_details(ticker: str = Query(...)):
             print(f"Trying Finnhub for {ticker}")
             finnhub_symbol = convert_ticker_for_finnhub(ticker)
             
-            quote = finnhub_get_quote(finnhub_symbol)
-            profile = finnhub_get_company_profile(finnhub_symbol)
-            metrics = finnhub_get_basic_financials(finnhub_symbol)
+            # Fetch quote, profile and metrics concurrently - they are
+            # independent requests and dominate this endpoint's latency
+            quote_future = submit_bounded(finnhub_get_quote, finnhub_symbol)
+            profile_future = submit_bounded(finnhub_get_company_profile, finnhub_symbol)
+            metrics_future = submit_bounded(finnhub_get_basic_financials, finnhub_symbol)
+            quote = quote_future.result()
+            profile = profile_future.result()
+            metrics = metrics_future.result()
             
             if quote and quote.get("c", 0) > 0:
                 data_source = "finnhub"
@@ -446,24 +877,34 @@ def get_stock_details(ticker: str = Query(...)):
         
         # ========== FALLBACK TO YFINANCE ==========
         if response is None:
+            if not yfinance_available():
+                raise YFinanceCooldownError("Yahoo Finance rate limited, cooling down")
             print(f"Falling back to yfinance for {ticker}")
             data_source = "yfinance"
             
-            # Add small delay to help with rate limiting
-            time.sleep(0.5)
+            # Space out yfinance calls to help with rate limiting
+            throttle_yfinance()
         
             # Get data from yfinance
-            stock = yf.Ticker(ticker)
+            stock = get_ticker(ticker)
             info = stock.info
             
             # Check if we got valid data (rate limit returns empty or error)
             if not info or len(info) < 5:
                 raise ValueError("Rate limited or invalid ticker")
             
-            # Get latest intraday data (1-minute intervals for real-time price)
-            hist_intraday = stock.history(period="1d", interval="1m")
-            # Get recent daily data for previous close
-            hist_daily = stock.history(period="5d", interval="1d")
+            # Fetch the intraday (real-time price) and daily (previous
+            # close) histories concurrently - both are always needed and
+            # each is an independent network round-trip
+            def fetch_history(period, interval):
+                throttle_yfinance()
+                return yf_call_with_backoff(stock.history, period=period, interval=interval,
+                                            timeout=YF_REQUEST_TIMEOUT)
+            
+            intraday_future = submit_bounded(fetch_history, "1d", "1m")
+            daily_future = submit_bounded(fetch_history, "5d", "1d")
+            hist_intraday = intraday_future.result()
+            hist_daily = daily_future.result()
             
             # Determine latest price source (prefer intraday if market is open, else use info)
             if not hist_intraday.empty and len(hist_intraday) > 0:
@@ -527,161 +968,48 @@ def get_stock_details(ticker: str = Query(...)):
                 "regularMarketChange": float(latest_price - prev_close),
                 "regularMarketChangePercent": float((latest_price - prev_close) / prev_close * 100) if prev_close > 0 else 0,
                 
-                # 52 Week Range
-                "fiftyTwoWeekHigh": info.get("fiftyTwoWeekHigh"),
-                "fiftyTwoWeekLow": info.get("fiftyTwoWeekLow"),
-                "fiftyTwoWeekChange": info.get("52WeekChange"),
-                "fiftyTwoWeekChangePercent": info.get("fiftyTwoWeekChangePercent"),
-                "fiftyTwoWeekHighChange": info.get("fiftyTwoWeekHighChange"),
-                "fiftyTwoWeekHighChangePercent": info.get("fiftyTwoWeekHighChangePercent"),
-                "fiftyTwoWeekLowChange": info.get("fiftyTwoWeekLowChange"),
-                "fiftyTwoWeekLowChangePercent": info.get("fiftyTwoWeekLowChangePercent"),
-                "fiftyTwoWeekRange": info.get("fiftyTwoWeekRange"),
-                
                 # Volume
                 "volume": int(latest_volume),
                 "regularMarketVolume": int(latest_volume),
-                "averageVolume": info.get("averageVolume"),
-                "averageVolume10days": info.get("averageVolume10days"),
-                "averageDailyVolume10Day": info.get("averageDailyVolume10Day"),
-                "averageDailyVolume3Month": info.get("averageDailyVolume3Month"),
                 
-                # Moving Averages
-                "fiftyDayAverage": info.get("fiftyDayAverage"),
-                "fiftyDayAverageChange": info.get("fiftyDayAverageChange"),
-                "fiftyDayAverageChangePercent": info.get("fiftyDayAverageChangePercent"),
-                "twoHundredDayAverage": info.get("twoHundredDayAverage"),
-                "twoHundredDayAverageChange": info.get("twoHundredDayAverageChange"),
-                "twoHundredDayAverageChangePercent": info.get("twoHundredDayAverageChangePercent"),
-                
-                # Market Cap & Valuation
-                "marketCap": info.get("marketCap"),
-                "enterpriseValue": info.get("enterpriseValue"),
-                "enterpriseToRevenue": info.get("enterpriseToRevenue"),
-                "enterpriseToEbitda": info.get("enterpriseToEbitda"),
-                
-                # Ratios
-                "trailingPE": info.get("trailingPE"),
-                "forwardPE": info.get("forwardPE"),
-                "priceToBook": info.get("priceToBook"),
-                "priceToSalesTrailing12Months": info.get("priceToSalesTrailing12Months"),
+                # Fields whose response key differs from the info key
+                "fiftyTwoWeekChange": info.get("52WeekChange"),
                 "pegRatio": info.get("trailingPegRatio"),
-                "beta": info.get("beta"),
                 
-                # Earnings & Dividends
+                # Fields combined from multiple info keys
                 "trailingEps": info.get("trailingEps") or info.get("epsTrailingTwelveMonths"),
                 "forwardEps": info.get("forwardEps") or info.get("epsForward"),
-                "epsCurrentYear": info.get("epsCurrentYear"),
                 "dividendRate": info.get("dividendRate") or info.get("trailingAnnualDividendRate"),
                 "dividendYield": info.get("dividendYield") or info.get("trailingAnnualDividendYield"),
-                "exDividendDate": info.get("exDividendDate"),
-                "payoutRatio": info.get("payoutRatio"),
-                "fiveYearAvgDividendYield": info.get("fiveYearAvgDividendYield"),
                 
-                # Profitability
-                "profitMargins": info.get("profitMargins"),
-                "operatingMargins": info.get("operatingMargins"),
-                "grossMargins": info.get("grossMargins"),
-                "ebitdaMargins": info.get("ebitdaMargins"),
-                "revenueGrowth": info.get("revenueGrowth"),
-                "earningsGrowth": info.get("earningsGrowth"),
-                "earningsQuarterlyGrowth": info.get("earningsQuarterlyGrowth"),
-                
-                # Financial Health
-                "totalRevenue": info.get("totalRevenue"),
-                "revenuePerShare": info.get("revenuePerShare"),
-                "totalCash": info.get("totalCash"),
-                "totalCashPerShare": info.get("totalCashPerShare"),
-                "totalDebt": info.get("totalDebt"),
-                "debtToEquity": info.get("debtToEquity"),
-                "currentRatio": info.get("currentRatio"),
-                "quickRatio": info.get("quickRatio"),
-                "returnOnAssets": info.get("returnOnAssets"),
-                "returnOnEquity": info.get("returnOnEquity"),
-                "freeCashflow": info.get("freeCashflow"),
-                "operatingCashflow": info.get("operatingCashflow"),
-                "ebitda": info.get("ebitda"),
-                "grossProfits": info.get("grossProfits"),
-                "netIncomeToCommon": info.get("netIncomeToCommon"),
-                
-                # Business Info
+                # Business/Trading Info with defaults
                 "sector": info.get("sector", "Unknown"),
-                "sectorKey": info.get("sectorKey"),
                 "industry": info.get("industry", "Unknown"),
-                "industryKey": info.get("industryKey"),
-                "fullTimeEmployees": info.get("fullTimeEmployees"),
-                "website": info.get("website"),
-                "irWebsite": info.get("irWebsite"),
-                "country": info.get("country"),
-                "city": info.get("city"),
-                "address1": info.get("address1"),
-                "address2": info.get("address2"),
-                "zip": info.get("zip"),
-                "phone": info.get("phone"),
-                "fax": info.get("fax"),
-                
-                # Description
-                "longBusinessSummary": info.get("longBusinessSummary"),
-                "businessSummary": info.get("businessSummary"),
-                
-                # Trading Info
                 "exchange": info.get("exchange", "NSE"),
-                "fullExchangeName": info.get("fullExchangeName"),
                 "quoteType": info.get("quoteType", "EQUITY"),
                 "currency": info.get("currency", "INR"),
                 "financialCurrency": info.get("financialCurrency", "INR"),
-                "exchangeTimezoneName": info.get("exchangeTimezoneName"),
-                "exchangeTimezoneShortName": info.get("exchangeTimezoneShortName"),
-                
-                # Analyst Recommendations
-                "targetHighPrice": info.get("targetHighPrice"),
-                "targetLowPrice": info.get("targetLowPrice"),
-                "targetMeanPrice": info.get("targetMeanPrice"),
-                "targetMedianPrice": info.get("targetMedianPrice"),
-                "recommendationKey": info.get("recommendationKey"),
-                "recommendationMean": info.get("recommendationMean"),
-                "numberOfAnalystOpinions": info.get("numberOfAnalystOpinions"),
-                "averageAnalystRating": info.get("averageAnalystRating"),
-                
-                # Additional Metrics
-                "sharesOutstanding": info.get("sharesOutstanding"),
-                "impliedSharesOutstanding": info.get("impliedSharesOutstanding"),
-                "floatShares": info.get("floatShares"),
-                "heldPercentInsiders": info.get("heldPercentInsiders"),
-                "heldPercentInstitutions": info.get("heldPercentInstitutions"),
-                "bookValue": info.get("bookValue"),
-                "lastDividendValue": info.get("lastDividendValue"),
-                "lastDividendDate": info.get("lastDividendDate"),
-                "lastSplitDate": info.get("lastSplitDate"),
-                "lastSplitFactor": info.get("lastSplitFactor"),
-                
-                # Risk Metrics
-                "auditRisk": info.get("auditRisk"),
-                "boardRisk": info.get("boardRisk"),
-                "compensationRisk": info.get("compensationRisk"),
-                "shareHolderRightsRisk": info.get("shareHolderRightsRisk"),
-                "overallRisk": info.get("overallRisk"),
-                
-                # Historical Highs/Lows
-                "allTimeHigh": info.get("allTimeHigh"),
-                "allTimeLow": info.get("allTimeLow"),
-                
-                # Bid/Ask
-                "bid": info.get("bid"),
-                "ask": info.get("ask"),
-                "bidSize": info.get("bidSize"),
-                "askSize": info.get("askSize"),
             }
+            
+            # Everything else is copied verbatim from info
+            response.update({key: info.get(key) for key in YF_INFO_PASSTHROUGH})
         
         # Cache the response before returning
-        set_cached_stock_details(ticker, response)
+        _stock_details_cache.set(ticker, response)
         
         return response
         
+    except YFinanceCooldownError:
+        # Breaker already open: fail fast, but don't restart its window
+        raise HTTPException(
+            status_code=429,
+            detail="Yahoo Finance rate limit reached. Please try again in a few minutes."
+        )
     except Exception as e:
         # If rate limited, return a more helpful message with retry-after hint
         error_msg = str(e)
         if "Rate" in error_msg or "Too Many" in error_msg or "limited" in error_msg.lower():
+            mark_yfinance_down()
             raise HTTPException(
                 status_code=429, 
                 detail="Yahoo Finance rate limit reached. Please try again in a few minutes."
@@ -689,27 +1017,128 @@ def get_stock_details(ticker: str = Query(...)):
         raise HTTPException(status_code=400, detail=f"Failed to fetch stock details: {error_msg}")
 
 
+@lru_cache(maxsize=8192)
+def format_bar_time(ts: int, fmt: str) -> str:
+    """Memoized epoch-to-string formatting for candle timestamps.
+
+    Daily (and session-aligned intraday) bars share identical epoch
+    timestamps across every ticker, so after the first ticker of the day
+    these strftime calls are all cache hits.
+    """
+    return datetime.fromtimestamp(ts).strftime(fmt)
+
+
+def get_latest_candle(ticker: str, interval: str) -> Optional[dict]:
+    """Fetch only the most recent bar for a ticker (Finnhub, then yfinance)"""
+    intraday = interval in ('1m', '2m', '5m', '15m', '30m', '60m', '90m', '1h')
+    time_fmt = "%Y-%m-%d %H:%M" if intraday else "%Y-%m-%d"
+
+    if FINNHUB_API_KEY:
+        from_ts, to_ts = period_to_timestamps("1d")
+        resolution = interval_to_finnhub_resolution(interval)
+        data = finnhub_get_candles(convert_ticker_for_finnhub(ticker), resolution, from_ts, to_ts)
+        if data and data.get("c"):
+            i = len(data["c"]) - 1
+            time_str = format_bar_time(data["t"][i], time_fmt)
+            return {
+                "time": time_str,
+                "date": time_str,
+                "open": float(data["o"][i]),
+                "high": float(data["h"][i]),
+                "low": float(data["l"][i]),
+                "close": float(data["c"][i]),
+                "volume": int(data["v"][i]) if data.get("v") else 0
+            }
+
+    if not yfinance_available():
+        raise YFinanceCooldownError("Yahoo Finance rate limited, cooling down")
+    throttle_yfinance()
+    hist = yf_call_with_backoff(get_ticker(ticker).history, period="1d", interval=interval, timeout=YF_REQUEST_TIMEOUT)
+    if hist.empty:
+        return None
+    row = hist.iloc[-1]
+    time_str = hist.index[-1].strftime(time_fmt)
+    return {
+        "time": time_str,
+        "date": time_str,
+        "open": float(row["Open"]) if pd.notna(row["Open"]) else None,
+        "high": float(row["High"]) if pd.notna(row["High"]) else None,
+        "low": float(row["Low"]) if pd.notna(row["Low"]) else None,
+        "close": float(row["Close"]) if pd.notna(row["Close"]) else None,
+        "volume": int(row["Volume"]) if pd.notna(row["Volume"]) else 0
+    }
+
+
+@router.get("/stocks/candles/stream")
+def stream_stock_candles(
+    ticker: str = Query(...),
+    interval: str = Query("1m", description="1m,2m,5m,15m,30m,60m,90m,1h,1d"),
+    updates: int = Query(20, description="Number of poll cycles before the stream closes")
+):
+    """Stream the latest candle over Server-Sent Events.
+
+    Pushes only the newest bar each poll cycle, so live charts don't have
+    to re-request (and the server re-serialize) the full candle history.
+    """
+    ticker = normalize_ticker(ticker)
+
+    # Async generator: a sync one would pin a default-threadpool thread
+    # for the stream's whole lifetime (minutes per subscriber). Only the
+    # blocking fetch itself is pushed to a worker thread; the sleeps
+    # between polls cost nothing but the open connection.
+    async def event_stream():
+        last_sent = None
+        for _ in range(updates):
+            try:
+                candle = await asyncio.to_thread(get_latest_candle, ticker, interval)
+            except Exception as e:
+                yield b"event: error\ndata: " + orjson.dumps({"detail": str(e)}) + b"\n\n"
+                break
+            if candle is not None and candle != last_sent:
+                last_sent = candle
+                yield b"data: " + orjson.dumps(candle) + b"\n\n"
+            await asyncio.sleep(CACHE_CANDLES_INTRADAY)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
 @router.get("/stocks/candles") 
-def get_stock_candles(
+async def get_stock_candles(
     ticker: str = Query(...),
-    period: str = Query("1mo", description="1d,5d,1mo,3mo,6mo,1y,2y,5y,10y,ytd,max"),
-    interval: str = Query("1d", description="1m,2m,5m,15m,30m,60m,90m,1h,1d,5d,1wk,1mo,3mo")
+    period: CandlePeriod = Query(CandlePeriod.ONE_MONTH),
+    interval: CandleInterval = Query(CandleInterval.ONE_DAY)
 ):
     """Get stock price history/candles using Finnhub (primary) or yfinance (fallback)"""
+    # Offload the blocking upstream calls so the event loop stays free
+    return await asyncio.to_thread(_get_stock_candles_sync, ticker, period.value, interval.value)
+
+
+def _get_stock_candles_sync(ticker: str, period: str, interval: str):
     try:
         # Clean ticker - allow .BO for BSE, default to .NS if no suffix
-        if not ticker.endswith('.NS') and not ticker.endswith('.BO'):
-            ticker = f"{ticker}.NS"
+        ticker = normalize_ticker(ticker)
         
-        # Check cache first
+        # Check cache first: serialized bytes, then the dict tier (which
+        # also covers candles persisted to disk across restarts)
         cache_key = f"{ticker}_{period}_{interval}"
-        cached = get_cached_candles(cache_key)
+        payload = _candles_payload_cache.get(cache_key)
+        if payload is not None:
+            return Response(content=payload, media_type="application/json")
+        
+        if _invalid_ticker_cache.get(ticker):
+            raise HTTPException(status_code=404, detail=f"No data available for {ticker}. The stock may be delisted or the ticker is invalid.")
+        
+        intraday_intervals = ['1m', '2m', '5m', '15m', '30m', '60m', '90m', '1h']
+        payload_ttl = CACHE_CANDLES_INTRADAY if interval in intraday_intervals else CACHE_CANDLES_DAILY
+        
+        cached = _stock_candles_cache.get(cache_key)
         if cached:
             print(f"Returning cached candles for {cache_key}")
-            return cached
+            payload = orjson.dumps(cached)
+            _candles_payload_cache.set(cache_key, payload, payload_ttl)
+            return Response(content=payload, media_type="application/json")
         
         response = None
-        intraday_intervals = ['1m', '2m', '5m', '15m', '30m', '60m', '90m', '1h']
         
         # ========== TRY FINNHUB FIRST ==========
         if FINNHUB_API_KEY:
@@ -721,23 +1150,27 @@ def get_stock_candles(
             finnhub_data = finnhub_get_candles(finnhub_symbol, resolution, from_ts, to_ts)
             
             if finnhub_data and finnhub_data.get("c"):
-                candles = []
-                for i in range(len(finnhub_data["c"])):
-                    ts = finnhub_data["t"][i]
-                    if interval in intraday_intervals:
-                        time_str = datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M")
-                    else:
-                        time_str = datetime.fromtimestamp(ts).strftime("%Y-%m-%d")
-                    
-                    candles.append({
+                # Build all bars in one zip pass instead of indexing each
+                # array per iteration (the arrays are parallel by contract)
+                closes = finnhub_data["c"]
+                volumes = finnhub_data.get("v") or [0] * len(closes)
+                time_fmt = "%Y-%m-%d %H:%M" if interval in intraday_intervals else "%Y-%m-%d"
+                
+                candles = [
+                    {
                         "time": time_str,
                         "date": time_str,
-                        "open": float(finnhub_data["o"][i]),
-                        "high": float(finnhub_data["h"][i]),
-                        "low": float(finnhub_data["l"][i]),
-                        "close": float(finnhub_data["c"][i]),
-                        "volume": int(finnhub_data["v"][i]) if finnhub_data.get("v") else 0
-                    })
+                        "open": float(o),
+                        "high": float(h),
+                        "low": float(l),
+                        "close": float(c),
+                        "volume": int(v)
+                    }
+                    for time_str, o, h, l, c, v in zip(
+                        (format_bar_time(ts, time_fmt) for ts in finnhub_data["t"]),
+                        finnhub_data["o"], finnhub_data["h"], finnhub_data["l"], closes, volumes
+                    )
+                ]
                 
                 response = {
                     "candles": candles,
@@ -750,59 +1183,74 @@ def get_stock_candles(
         
         # ========== FALLBACK TO YFINANCE ==========
         if response is None:
+            if not yfinance_available():
+                raise YFinanceCooldownError("Yahoo Finance rate limited, cooling down")
             print(f"Falling back to yfinance candles for {ticker}")
             
-            # Add small delay to help with rate limiting
-            time.sleep(0.3)
+            # Space out yfinance calls to help with rate limiting
+            throttle_yfinance()
                 
-            stock = yf.Ticker(ticker)
+            stock = get_ticker(ticker)
             
             if interval in intraday_intervals:
                 # Try fetching intraday data first
-                hist = stock.history(period=period, interval=interval)
+                hist = yf_call_with_backoff(stock.history, period=period, interval=interval, timeout=YF_REQUEST_TIMEOUT)
                 
                 # If no intraday data (market closed), fall back to daily data
                 if hist.empty or len(hist) < 2:
                     print(f"No intraday data for {ticker}, falling back to daily data")
                     # Use more days for daily fallback
                     fallback_period = "5d" if period == "1d" else period
-                    hist = stock.history(period=fallback_period, interval="1d")
+                    hist = yf_call_with_backoff(stock.history, period=fallback_period, interval="1d", timeout=YF_REQUEST_TIMEOUT)
                     interval = "1d"  # Update interval for response
             else:
-                hist = stock.history(period=period, interval=interval)
+                hist = yf_call_with_backoff(stock.history, period=period, interval=interval, timeout=YF_REQUEST_TIMEOUT)
             
             # If still empty, try with a longer period
             if hist.empty:
                 print(f"No data for {ticker} with period {period}, trying 1mo")
-                hist = stock.history(period="1mo", interval="1d")
+                hist = yf_call_with_backoff(stock.history, period="1mo", interval="1d", timeout=YF_REQUEST_TIMEOUT)
             
             if hist.empty:
-                raise ValueError(f"No data available for {ticker}. The stock may be delisted or the ticker is invalid.")
+                _invalid_ticker_cache.set(ticker, True)
+                # Same 404 as the negative-cache hit above, so the status
+                # doesn't flip between a fresh failure and a cached one
+                raise HTTPException(status_code=404, detail=f"No data available for {ticker}. The stock may be delisted or the ticker is invalid.")
             
-            # Convert to candles format
-            candles = []
-            for index, row in hist.iterrows():
-                # Handle both date and datetime indexes
-                if hasattr(index, 'strftime'):
-                    if interval in intraday_intervals:
-                        time_str = index.strftime("%Y-%m-%d %H:%M")
-                    else:
-                        time_str = index.strftime("%Y-%m-%d")
+            # Convert to candles format via vectorized column extraction
+            # (iterrows builds a Series per row and is ~10x slower)
+            # Handle both date and datetime indexes
+            if hasattr(hist.index, 'strftime'):
+                if interval in intraday_intervals:
+                    time_strs = hist.index.strftime("%Y-%m-%d %H:%M")
                 else:
-                    time_str = str(index)
-                    
-                candles.append({
+                    time_strs = hist.index.strftime("%Y-%m-%d")
+            else:
+                time_strs = [str(index) for index in hist.index]
+
+            # .tolist() converts each column to native Python floats in
+            # one C call, so the loop below does no per-element numpy
+            # scalar unboxing (NaN comparisons still work via x != x)
+            opens = hist["Open"].to_numpy().tolist()
+            highs = hist["High"].to_numpy().tolist()
+            lows = hist["Low"].to_numpy().tolist()
+            closes = hist["Close"].to_numpy().tolist()
+            volumes = hist["Volume"].to_numpy().tolist()
+
+            # Skip candles without a close price (same filter as before)
+            candles = [
+                {
                     "time": time_str,
                     "date": time_str,
-                    "open": float(row["Open"]) if pd.notna(row["Open"]) else None,
-                    "high": float(row["High"]) if pd.notna(row["High"]) else None, 
-                    "low": float(row["Low"]) if pd.notna(row["Low"]) else None,
-                    "close": float(row["Close"]) if pd.notna(row["Close"]) else None,
-                    "volume": int(row["Volume"]) if pd.notna(row["Volume"]) else 0
-                })
-            
-            # Filter out any candles with None values
-            candles = [c for c in candles if c["close"] is not None]
+                    "open": o if o == o else None,
+                    "high": h if h == h else None,
+                    "low": l if l == l else None,
+                    "close": c,
+                    "volume": int(v) if v == v else 0
+                }
+                for time_str, o, h, l, c, v in zip(time_strs, opens, highs, lows, closes, volumes)
+                if c == c
+            ]
             
             response = {
                 "candles": candles,
@@ -812,14 +1260,28 @@ def get_stock_candles(
                 "dataSource": "yfinance"
             }
         
-        # Cache the response
-        set_cached_candles(cache_key, response)
-        
-        return response
+        # Cache the response (short TTL for intraday data, longer for daily)
+        ttl = CACHE_CANDLES_INTRADAY if interval in intraday_intervals else CACHE_CANDLES_DAILY
+        _stock_candles_cache.set(cache_key, response, ttl)
+
+        # Serialize once with orjson and skip FastAPI's jsonable_encoder,
+        # which walks every candle dict on the default return path
+        payload = orjson.dumps(response)
+        _candles_payload_cache.set(cache_key, payload, ttl)
+        return Response(content=payload, media_type="application/json")
         
+    except HTTPException:
+        raise
+    except YFinanceCooldownError:
+        # Breaker already open: fail fast, but don't restart its window
+        raise HTTPException(
+            status_code=429,
+            detail="Rate limit reached. Please try again in a few minutes."
+        )
     except Exception as e:
         error_msg = str(e)
         if "Rate" in error_msg or "Too Many" in error_msg or "limited" in error_msg.lower():
+            mark_yfinance_down()
             raise HTTPException(
                 status_code=429, 
                 detail="Rate limit reached. Please try again in a few minutes."
@@ -6,6 +6,7 @@ import pandas as pd
 import numpy as np
 import joblib
 import os
+import time
 import yfinance as yf
 from datetime import datetime, timedelta
 import warnings
@@ -15,6 +16,66 @@ warnings.filterwarnings('ignore')
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 MODEL_FILE = os.path.join(BASE_DIR, 'models', 'enhanced_trading_model.pkl')
 
+# Socket-level timeout for yfinance fetches (fail fast instead of hanging)
+YF_REQUEST_TIMEOUT = 10
+
+# Disk-backed cache for per-ticker fundamentals (same joblib layout as the
+# training-side fundamentals cache). Metadata changes slowly, so a 24h TTL
+# avoids refetching yf.Ticker.info on every prediction.
+FUNDAMENTALS_CACHE_FILE = os.path.join(BASE_DIR, 'data', 'serving_fundamentals_cache.pkl')
+FUNDAMENTALS_TTL = timedelta(hours=24)
+
+_fundamentals_cache = None
+
+# In-process freshness deadlines on the monotonic clock. The wall-clock
+# 'timestamp' persisted with each entry is only consulted to re-derive a
+# deadline after a restart; steady-state hits compare two floats instead
+# of building datetime objects, and NTP steps can't expire or resurrect
+# entries mid-process.
+_fundamentals_fresh_until = {}
+
+
+def get_fundamental_features(ticker):
+    """Fetch the fundamental feature values for a ticker, cached with TTL"""
+    global _fundamentals_cache
+
+    if _fundamentals_cache is None:
+        _fundamentals_cache = {}
+        if os.path.exists(FUNDAMENTALS_CACHE_FILE):
+            try:
+                _fundamentals_cache = joblib.load(FUNDAMENTALS_CACHE_FILE)
+            except Exception:
+                _fundamentals_cache = {}
+
+    cached = _fundamentals_cache.get(ticker)
+    if cached:
+        deadline = _fundamentals_fresh_until.get(ticker)
+        if deadline is None:
+            remaining = FUNDAMENTALS_TTL - (datetime.now() - cached['timestamp'])
+            if remaining > timedelta(0):
+                _fundamentals_fresh_until[ticker] = time.monotonic() + remaining.total_seconds()
+                return cached['data']
+        elif time.monotonic() < deadline:
+            return cached['data']
+
+    stock = yf.Ticker(ticker)
+    info = stock.info
+    fund_data = {
+        'fund_pe_ratio': info.get('trailingPE', info.get('forwardPE', 0)) or 0,
+        'fund_dividend_yield': info.get('dividendYield', 0) or 0,
+        'fund_forward_eps': info.get('forwardEps', 0) or 0,
+        'fund_target_mean_price': info.get('targetMeanPrice', 0) or 0,
+    }
+
+    _fundamentals_cache[ticker] = {'data': fund_data, 'timestamp': datetime.now()}
+    _fundamentals_fresh_until[ticker] = time.monotonic() + FUNDAMENTALS_TTL.total_seconds()
+    try:
+        joblib.dump(_fundamentals_cache, FUNDAMENTALS_CACHE_FILE)
+    except Exception:
+        pass
+
+    return fund_data
+
 class EnhancedFeatureEngineer:
     """Feature engineering matching the training pipeline"""
     
@@ -27,38 +88,45 @@ class EnhancedFeatureEngineer:
         low = df['Low']
         open_ = df['Open']
         volume = df['Volume'] if 'Volume' in df.columns else pd.Series(0, index=df.index)
-        
+
+        # Collect every indicator in a dict and concat once at the end -
+        # assigning ~70 columns one by one fragments the DataFrame and
+        # reallocates its block manager on each insertion
+        feats = {}
+
         # ============ RETURNS ============
-        df['returns'] = close.pct_change()
-        df['returns_1d'] = close.pct_change()
-        df['returns_2d'] = close.pct_change(2)
-        df['returns_3d'] = close.pct_change(3)
-        df['returns_5d'] = close.pct_change(5)
-        df['returns_10d'] = close.pct_change(10)
-        df['returns_20d'] = close.pct_change(20)
+        feats['returns'] = close.pct_change()
+        feats['returns_1d'] = close.pct_change()
+        feats['returns_2d'] = close.pct_change(2)
+        feats['returns_3d'] = close.pct_change(3)
+        feats['returns_5d'] = close.pct_change(5)
+        feats['returns_10d'] = close.pct_change(10)
+        feats['returns_20d'] = close.pct_change(20)
         
         # ============ MOMENTUM ============
-        df['momentum_3'] = close.pct_change(3)
-        df['momentum_5'] = close.pct_change(5)
-        df['momentum_10'] = close.pct_change(10)
-        df['momentum_20'] = close.pct_change(20)
+        feats['momentum_3'] = close.pct_change(3)
+        feats['momentum_5'] = close.pct_change(5)
+        feats['momentum_10'] = close.pct_change(10)
+        feats['momentum_20'] = close.pct_change(20)
         
         # ============ MOVING AVERAGES ============
         for period in [5, 10, 20, 50]:
-            df[f'sma_{period}'] = close.rolling(period).mean()
-            df[f'ema_{period}'] = close.ewm(span=period, adjust=False).mean()
-            df[f'price_to_sma_{period}'] = close / df[f'sma_{period}']
-            df[f'price_to_ema_{period}'] = close / df[f'ema_{period}']
+            feats[f'sma_{period}'] = close.rolling(period).mean()
+            feats[f'ema_{period}'] = close.ewm(span=period, adjust=False).mean()
+            feats[f'price_to_sma_{period}'] = close / feats[f'sma_{period}']
+            feats[f'price_to_ema_{period}'] = close / feats[f'ema_{period}']
         
         # ============ BOLLINGER BANDS ============
         bb_window = 20
         bb_std = close.rolling(bb_window).std()
         bb_mean = close.rolling(bb_window).mean()
-        df['bb_upper'] = bb_mean + (2 * bb_std)
-        df['bb_lower'] = bb_mean - (2 * bb_std)
-        df['bb_position'] = (close - df['bb_lower']) / (df['bb_upper'] - df['bb_lower'] + 1e-10)
-        df['bb_width'] = (df['bb_upper'] - df['bb_lower']) / bb_mean
-        df['bb_squeeze'] = df['bb_width']
+        bb_upper = bb_mean + (2 * bb_std)
+        bb_lower = bb_mean - (2 * bb_std)
+        feats['bb_upper'] = bb_upper
+        feats['bb_lower'] = bb_lower
+        feats['bb_position'] = (close - bb_lower) / (bb_upper - bb_lower + 1e-10)
+        feats['bb_width'] = (bb_upper - bb_lower) / bb_mean
+        feats['bb_squeeze'] = feats['bb_width']
         
         # ============ RSI ============
         delta = close.diff()
@@ -66,115 +134,141 @@ class EnhancedFeatureEngineer:
             gain = delta.where(delta > 0, 0).rolling(period).mean()
             loss = (-delta.where(delta < 0, 0)).rolling(period).mean()
             rs = gain / (loss + 1e-10)
-            df[f'rsi_{period}'] = 100 - (100 / (1 + rs))
-        df['rsi_14_slope'] = df['rsi_14'].diff(5)
+            feats[f'rsi_{period}'] = 100 - (100 / (1 + rs))
+        feats['rsi_14_slope'] = feats['rsi_14'].diff(5)
         
         # ============ MACD ============
         ema_12 = close.ewm(span=12, adjust=False).mean()
         ema_26 = close.ewm(span=26, adjust=False).mean()
-        df['macd'] = ema_12 - ema_26
-        df['macd_signal'] = df['macd'].ewm(span=9, adjust=False).mean()
-        df['macd_histogram'] = df['macd'] - df['macd_signal']
+        macd = ema_12 - ema_26
+        macd_signal = macd.ewm(span=9, adjust=False).mean()
+        feats['macd'] = macd
+        feats['macd_signal'] = macd_signal
+        feats['macd_histogram'] = macd - macd_signal
         
         # ============ STOCHASTIC ============
         high_14 = high.rolling(14).max()
         low_14 = low.rolling(14).min()
-        df['stoch_k'] = 100 * (close - low_14) / (high_14 - low_14 + 1e-10)
-        df['stoch_d'] = df['stoch_k'].rolling(3).mean()
+        feats['stoch_k'] = 100 * (close - low_14) / (high_14 - low_14 + 1e-10)
+        feats['stoch_d'] = feats['stoch_k'].rolling(3).mean()
         
         # ============ VOLATILITY ============
-        df['volatility_5'] = df['returns_1d'].rolling(5).std()
-        df['volatility_10'] = df['returns_1d'].rolling(10).std()
-        df['volatility_20'] = df['returns_1d'].rolling(20).std()
-        df['volatility_ratio'] = df['volatility_5'] / (df['volatility_20'] + 1e-10)
+        feats['volatility_5'] = feats['returns_1d'].rolling(5).std()
+        feats['volatility_10'] = feats['returns_1d'].rolling(10).std()
+        feats['volatility_20'] = feats['returns_1d'].rolling(20).std()
+        feats['volatility_ratio'] = feats['volatility_5'] / (feats['volatility_20'] + 1e-10)
         
         # ATR
         tr1 = high - low
         tr2 = np.abs(high - close.shift())
         tr3 = np.abs(low - close.shift())
-        df['true_range'] = np.maximum(tr1, np.maximum(tr2, tr3))
-        df['atr_14'] = df['true_range'].rolling(14).mean()
-        df['atr_ratio'] = df['true_range'] / (df['atr_14'] + 1e-10)
-        df['atr'] = df['atr_14']
+        true_range = np.maximum(tr1, np.maximum(tr2, tr3))
+        atr_14 = true_range.rolling(14).mean()
+        feats['true_range'] = true_range
+        feats['atr_14'] = atr_14
+        feats['atr_ratio'] = true_range / (atr_14 + 1e-10)
+        feats['atr'] = atr_14
         
         # ============ VOLUME ============
-        df['volume_sma_20'] = volume.rolling(20).mean()
-        df['volume_ratio'] = volume / (df['volume_sma_20'] + 1)
-        df['volume_sma_10'] = volume.rolling(10).mean()
-        df['volume_trend'] = df['volume_sma_10'] / (df['volume_sma_20'] + 1)
-        df['obv'] = (np.sign(close.diff()) * volume).cumsum()
-        df['obv_sma'] = df['obv'].rolling(20).mean()
-        df['obv_trend'] = df['obv'] / (df['obv_sma'].abs() + 1)
+        volume_sma_20 = volume.rolling(20).mean()
+        volume_sma_10 = volume.rolling(10).mean()
+        feats['volume_sma_20'] = volume_sma_20
+        feats['volume_ratio'] = volume / (volume_sma_20 + 1)
+        feats['volume_sma_10'] = volume_sma_10
+        feats['volume_trend'] = volume_sma_10 / (volume_sma_20 + 1)
+        obv = (np.sign(close.diff()) * volume).cumsum()
+        obv_sma = obv.rolling(20).mean()
+        feats['obv'] = obv
+        feats['obv_sma'] = obv_sma
+        feats['obv_trend'] = obv / (obv_sma.abs() + 1)
         
         # ============ SUPPORT/RESISTANCE ============
-        df['high_20'] = high.rolling(20).max()
-        df['low_20'] = low.rolling(20).min()
-        df['dist_to_high_20'] = (df['high_20'] - close) / close
-        df['dist_to_low_20'] = (close - df['low_20']) / close
-        df['range_position'] = (close - df['low_20']) / (df['high_20'] - df['low_20'] + 1e-10)
-        df['distance_to_support'] = df['dist_to_low_20']
-        df['distance_to_resistance'] = df['dist_to_high_20']
+        high_20 = high.rolling(20).max()
+        low_20 = low.rolling(20).min()
+        feats['high_20'] = high_20
+        feats['low_20'] = low_20
+        feats['dist_to_high_20'] = (high_20 - close) / close
+        feats['dist_to_low_20'] = (close - low_20) / close
+        feats['range_position'] = (close - low_20) / (high_20 - low_20 + 1e-10)
+        feats['distance_to_support'] = feats['dist_to_low_20']
+        feats['distance_to_resistance'] = feats['dist_to_high_20']
         
         # ============ WILLIAMS %R ============
-        df['williams_r'] = -100 * (high_14 - close) / (high_14 - low_14 + 1e-10)
+        feats['williams_r'] = -100 * (high_14 - close) / (high_14 - low_14 + 1e-10)
         
         # ============ CCI ============
         typical_price = (high + low + close) / 3
-        df['cci'] = (typical_price - typical_price.rolling(20).mean()) / (0.015 * typical_price.rolling(20).std() + 1e-10)
+        feats['cci'] = (typical_price - typical_price.rolling(20).mean()) / (0.015 * typical_price.rolling(20).std() + 1e-10)
         
         # ============ ADX ============
         plus_dm = high.diff()
         minus_dm = -low.diff()
         plus_dm = plus_dm.where(plus_dm > 0, 0)
         minus_dm = minus_dm.where(minus_dm > 0, 0)
-        tr_14 = df['true_range'].rolling(14).sum()
-        df['plus_di'] = 100 * (plus_dm.rolling(14).sum() / (tr_14 + 1e-10))
-        df['minus_di'] = 100 * (minus_dm.rolling(14).sum() / (tr_14 + 1e-10))
-        dx = 100 * np.abs(df['plus_di'] - df['minus_di']) / (df['plus_di'] + df['minus_di'] + 1e-10)
-        df['adx'] = dx.rolling(14).mean()
+        tr_14 = true_range.rolling(14).sum()
+        plus_di = 100 * (plus_dm.rolling(14).sum() / (tr_14 + 1e-10))
+        minus_di = 100 * (minus_dm.rolling(14).sum() / (tr_14 + 1e-10))
+        feats['plus_di'] = plus_di
+        feats['minus_di'] = minus_di
+        dx = 100 * np.abs(plus_di - minus_di) / (plus_di + minus_di + 1e-10)
+        feats['adx'] = dx.rolling(14).mean()
         
         # ============ GAPS ============
-        df['gap'] = (open_ - close.shift(1)) / close.shift(1)
+        feats['gap'] = (open_ - close.shift(1)) / close.shift(1)
         
         # ============ PRICE SLOPE ============
-        df['price_slope'] = close.pct_change(5)
+        feats['price_slope'] = close.pct_change(5)
         
         # ============ PATTERNS ============
-        df['higher_high'] = (high > high.shift()).astype(int)
-        df['lower_low'] = (low < low.shift()).astype(int)
-        df['inside_bar'] = ((high <= high.shift()) & (low >= low.shift())).astype(int)
-        df['overnight_return'] = (open_ - close.shift()) / close.shift()
-        df['intraday_return'] = (close - open_) / open_
-        df['price_range'] = (high - low) / close
-        df['rate_of_change'] = close.pct_change(10) * 100
+        feats['higher_high'] = (high > high.shift()).astype(int)
+        feats['lower_low'] = (low < low.shift()).astype(int)
+        feats['inside_bar'] = ((high <= high.shift()) & (low >= low.shift())).astype(int)
+        feats['overnight_return'] = (open_ - close.shift()) / close.shift()
+        feats['intraday_return'] = (close - open_) / open_
+        feats['price_range'] = (high - low) / close
+        feats['rate_of_change'] = close.pct_change(10) * 100
         
         # ============ FUNDAMENTAL DATA (from yfinance) ============
         if ticker:
             try:
-                stock = yf.Ticker(ticker)
-                info = stock.info
-                df['fund_pe_ratio'] = info.get('trailingPE', info.get('forwardPE', 0)) or 0
-                df['fund_dividend_yield'] = info.get('dividendYield', 0) or 0
-                df['fund_forward_eps'] = info.get('forwardEps', 0) or 0
-                df['fund_target_mean_price'] = info.get('targetMeanPrice', 0) or 0
+                fund_data = get_fundamental_features(ticker)
+                feats['fund_pe_ratio'] = fund_data['fund_pe_ratio']
+                feats['fund_dividend_yield'] = fund_data['fund_dividend_yield']
+                feats['fund_forward_eps'] = fund_data['fund_forward_eps']
+                feats['fund_target_mean_price'] = fund_data['fund_target_mean_price']
             except:
-                df['fund_pe_ratio'] = 0
-                df['fund_dividend_yield'] = 0
-                df['fund_forward_eps'] = 0
-                df['fund_target_mean_price'] = 0
+                feats['fund_pe_ratio'] = 0
+                feats['fund_dividend_yield'] = 0
+                feats['fund_forward_eps'] = 0
+                feats['fund_target_mean_price'] = 0
         else:
-            df['fund_pe_ratio'] = 0
-            df['fund_dividend_yield'] = 0
-            df['fund_forward_eps'] = 0
-            df['fund_target_mean_price'] = 0
+            feats['fund_pe_ratio'] = 0
+            feats['fund_dividend_yield'] = 0
+            feats['fund_forward_eps'] = 0
+            feats['fund_target_mean_price'] = 0
         
+        # Single concat instead of 70+ incremental column insertions
+        df = pd.concat([df, pd.DataFrame(feats, index=df.index)], axis=1)
+
         return df
 
+# Deserialized model components, reused across predict() calls until the
+# model file on disk changes (e.g. after retraining)
+_model_cache = None
+_model_cache_mtime = None
+
+
 def load_enhanced_model():
-    """Load the enhanced model with preprocessing components"""
+    """Load the enhanced model with preprocessing components (cached per file mtime)"""
+    global _model_cache, _model_cache_mtime
+
     if not os.path.exists(MODEL_FILE):
         raise FileNotFoundError(f"Enhanced model not found at {MODEL_FILE}")
     
+    mtime = os.path.getmtime(MODEL_FILE)
+    if _model_cache is not None and _model_cache_mtime == mtime:
+        return _model_cache
+    
     try:
         model_data = joblib.load(MODEL_FILE)
         
@@ -196,13 +290,15 @@ def load_enhanced_model():
         print(f"✅ Enhanced model loaded: {metadata.get('algorithm', 'Unknown')} "
               f"(Test AUC: {metadata.get('test_auc', 'N/A'):.4f})")
         
-        return {
+        _model_cache = {
             'model': model,
             'scaler': scaler,
             'selector': selector,
             'features': selected_features,
             'metadata': metadata
         }
+        _model_cache_mtime = mtime
+        return _model_cache
         
     except Exception as e:
         print(f"❌ Failed to load enhanced model: {e}")
@@ -217,19 +313,19 @@ def get_stock_data(ticker, period='1y'):
             # Try NSE first, then BSE if NSE fails
             nse_ticker = f"{ticker}.NS"
             stock = yf.Ticker(nse_ticker)
-            data = stock.history(period=period)
+            data = stock.history(period=period, timeout=YF_REQUEST_TIMEOUT)
             
             if data.empty:
                 # Try BSE
                 bse_ticker = f"{ticker}.BO"
                 stock = yf.Ticker(bse_ticker)
-                data = stock.history(period=period)
+                data = stock.history(period=period, timeout=YF_REQUEST_TIMEOUT)
                 ticker = bse_ticker
             else:
                 ticker = nse_ticker
         else:
             stock = yf.Ticker(ticker)
-            data = stock.history(period=period)
+            data = stock.history(period=period, timeout=YF_REQUEST_TIMEOUT)
         
         if data.empty:
             raise ValueError(f"No data available for {ticker}")
@@ -339,15 +435,12 @@ def predict(ticker, owns_stock=False, rag_features=None):
             
             if missing_features:
                 print(f"Warning: Missing {len(missing_features)} features, filling with 0")
-            
-            # Create feature matrix with all required features
-            X = pd.DataFrame(index=latest_data.index)
-            for f in selected_features:
-                if f in latest_data.columns:
-                    X[f] = latest_data[f].values
-                else:
-                    X[f] = 0
-            
+
+            # Create feature matrix with all required features in one pass
+            # (reindex selects/creates all columns at once instead of a
+            # per-feature insertion loop, which avoids N small allocations)
+            X = latest_data.reindex(columns=selected_features, fill_value=0)
+
             X = X.fillna(0)
             X = X.replace([np.inf, -np.inf], 0)
             
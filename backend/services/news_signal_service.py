@@ -37,19 +37,8 @@ def get_news_signal_features(ticker: str, date: str) -> dict:
             return _get_neutral_features()
         
         # Map ticker to company name for better news results
-        ticker_map = {
-            "RELIANCE": "Reliance Industries",
-            "TCS": "Tata Consultancy Services",
-            "INFY": "Infosys",
-            "HDFC": "HDFC Bank",
-            "ICICIBANK": "ICICI Bank",
-            "HDFCBANK": "HDFC Bank",
-            "SBIN": "State Bank of India",
-            "WIPRO": "Wipro"
-        }
-        # Strip suffix for mapping
-        clean_ticker = ticker.split('.')[0]
-        company = ticker_map.get(clean_ticker, clean_ticker)
+        from core.tickers import ticker_to_company
+        company = ticker_to_company(ticker)
         
         # Fetch news from Newsdata.io
         logger.debug(f"Fetching news for {ticker}...")
@@ -138,14 +127,18 @@ def get_news_signal_features(ticker: str, date: str) -> dict:
         return _get_neutral_features()
 
 
+# Neutral RAG feature template, built once instead of per failed call
+_NEUTRAL_FEATURES = {
+    "rag_sentiment": 0.0,
+    "rag_sentiment_strength": 0.0,
+    "rag_confidence": 0.0,
+    "num_bullish_drivers": 0,
+    "num_bearish_risks": 0,
+    "event_present": 0,
+    "uncertainty_present": 0
+}
+
+
 def _get_neutral_features() -> dict:
     """Returns neutral RAG features when API fails."""
-    return {
-        "rag_sentiment": 0.0,
-        "rag_sentiment_strength": 0.0,
-        "rag_confidence": 0.0,
-        "num_bullish_drivers": 0,
-        "num_bearish_risks": 0,
-        "event_present": 0,
-        "uncertainty_present": 0
-    }
\ No newline at end of file
+    return dict(_NEUTRAL_FEATURES)
\ No newline at end of file
@@ -21,6 +21,7 @@ from sklearn.ensemble import (
 )
 from sklearn.metrics import classification_report, roc_auc_score, accuracy_score
 import warnings
+from concurrent.futures import ThreadPoolExecutor
 warnings.filterwarnings('ignore')
 
 # Configure logging
@@ -54,6 +55,7 @@ except ImportError:
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(BASE_DIR, 'data')
 FUNDAMENTALS_CACHE = os.path.join(DATA_DIR, 'fundamentals_cache.pkl')
+FEATURES_CACHE = os.path.join(DATA_DIR, 'features_cache.pkl')
 MODEL_DIR = os.path.join(BASE_DIR, 'models')
 MODEL_FILE = os.path.join(MODEL_DIR, 'enhanced_trading_model.pkl')
 
@@ -66,19 +68,35 @@ def fetch_fundamental_data(symbols):
         print("  ⚠️ yfinance not available, skipping fundamentals")
         return {}
     
-    # Try to load from cache first
+    # Load the cache and keep every per-symbol entry still within TTL,
+    # so a refresh only fetches symbols that are missing or stale
+    cached_data = {}
+    fetched_at = {}
     if os.path.exists(FUNDAMENTALS_CACHE):
         try:
             cache = joblib.load(FUNDAMENTALS_CACHE)
-            cache_age = (datetime.now() - cache.get('timestamp', datetime.min)).days
-            if cache_age < 7:  # Use cache if less than 7 days old
-                print(f"  ✓ Loaded fundamentals from cache ({cache_age} days old)")
-                return cache.get('data', {})
+            cached_data = cache.get('data', {})
+            # Older caches carried one global timestamp; treat it as the
+            # fetch time of every symbol they contain
+            fetched_at = cache.get('fetched_at') or dict.fromkeys(
+                cached_data, cache.get('timestamp', datetime.min))
         except:
             pass
     
-    print("\n📊 Fetching Fundamental Data from Yahoo Finance...")
+    now = datetime.now()
     fundamentals = {}
+    stale_symbols = []
+    for symbol in symbols:
+        if symbol in cached_data and (now - fetched_at.get(symbol, datetime.min)).days < 7:
+            fundamentals[symbol] = cached_data[symbol]
+        else:
+            stale_symbols.append(symbol)
+    
+    if not stale_symbols:
+        print(f"  ✓ Loaded fundamentals for all {len(fundamentals)} symbols from cache")
+        return fundamentals
+    
+    print(f"\n📊 Fetching Fundamental Data from Yahoo Finance ({len(stale_symbols)} symbols, {len(fundamentals)} cached)...")
     
     # Special symbol mappings for NSE stocks (Yahoo Finance uses different tickers)
     SYMBOL_MAP = {
@@ -135,83 +153,104 @@ def fetch_fundamental_data(symbols):
     
     import time
     
+    # Resolve Yahoo Finance tickers up front so batches can be built
+    ticker_map = {}
     for symbol in symbols:
-        try:
-            # Convert to Yahoo Finance format using mapping
-            if symbol.endswith('.NS'):
-                ticker = symbol
-            elif symbol in SYMBOL_MAP:
-                ticker = SYMBOL_MAP[symbol]
-            else:
-                ticker = f"{symbol}.NS"
-            
-            # Add small delay to avoid rate limiting
+        if symbol.endswith('.NS'):
+            ticker_map[symbol] = symbol
+        elif symbol in SYMBOL_MAP:
+            ticker_map[symbol] = SYMBOL_MAP[symbol]
+        else:
+            ticker_map[symbol] = f"{symbol}.NS"
+    
+    # Fetch in batches via yf.Tickers: one multiplexed session per batch
+    # instead of a separate HTTP round-trip per symbol
+    BATCH_SIZE = 50
+    symbol_list = stale_symbols
+    for start in range(0, len(symbol_list), BATCH_SIZE):
+        batch = symbol_list[start:start + BATCH_SIZE]
+        
+        if start > 0:
+            # Small pause between batches to avoid rate limiting
             time.sleep(0.3)
-            
-            stock = yf.Ticker(ticker)
-            info = stock.info
-            
-            # Extract key fundamental metrics
-            fund_data = {
-                # Valuation
-                'pe_ratio': info.get('trailingPE', np.nan),
-                'forward_pe': info.get('forwardPE', np.nan),
-                'pb_ratio': info.get('priceToBook', np.nan),
-                'ps_ratio': info.get('priceToSalesTrailing12Months', np.nan),
-                'peg_ratio': info.get('pegRatio', np.nan),
-                'ev_ebitda': info.get('enterpriseToEbitda', np.nan),
-                
-                # Profitability
-                'profit_margin': info.get('profitMargins', np.nan),
-                'operating_margin': info.get('operatingMargins', np.nan),
-                'gross_margin': info.get('grossMargins', np.nan),
-                'roe': info.get('returnOnEquity', np.nan),
-                'roa': info.get('returnOnAssets', np.nan),
-                
-                # Growth
-                'earnings_growth': info.get('earningsGrowth', np.nan),
-                'revenue_growth': info.get('revenueGrowth', np.nan),
-                'earnings_quarterly_growth': info.get('earningsQuarterlyGrowth', np.nan),
-                
-                # Financial Health
-                'debt_to_equity': info.get('debtToEquity', np.nan),
-                'current_ratio': info.get('currentRatio', np.nan),
-                'quick_ratio': info.get('quickRatio', np.nan),
-                
-                # Dividends
-                'dividend_yield': info.get('dividendYield', np.nan),
-                'payout_ratio': info.get('payoutRatio', np.nan),
-                
-                # Size
-                'market_cap': info.get('marketCap', np.nan),
-                'enterprise_value': info.get('enterpriseValue', np.nan),
-                
-                # Analyst
-                'target_mean_price': info.get('targetMeanPrice', np.nan),
-                'recommendation': info.get('recommendationMean', np.nan),  # 1=Buy, 5=Sell
-                
-                # Earnings
-                'trailing_eps': info.get('trailingEps', np.nan),
-                'forward_eps': info.get('forwardEps', np.nan),
-            }
-            
-            fundamentals[symbol] = fund_data
-            print(f"  ✓ {symbol}")
-            
+        
+        try:
+            batch_tickers = yf.Tickers(" ".join(ticker_map[s] for s in batch))
         except Exception as e:
-            print(f"  ✗ {symbol}: {str(e)[:30]}")
-            fundamentals[symbol] = {}
+            log("  ✗ batch %d-%d: %s", start, start + len(batch), str(e)[:30])
+            for symbol in batch:
+                fundamentals[symbol] = {}
+            continue
+        
+        for symbol in batch:
+            try:
+                info = batch_tickers.tickers[ticker_map[symbol].upper()].info
+                fundamentals[symbol] = extract_fundamentals(info)
+                log("  ✓ %s", symbol)
+            except Exception as e:
+                log("  ✗ %s: %s", symbol, str(e)[:30])
+                fundamentals[symbol] = {}
     
-    # Cache the data
+    # Cache the data, merging with still-fresh entries from older runs
     try:
-        joblib.dump({'data': fundamentals, 'timestamp': datetime.now()}, FUNDAMENTALS_CACHE)
-        print(f"  ✓ Cached fundamentals for {len(fundamentals)} symbols")
+        for symbol in stale_symbols:
+            fetched_at[symbol] = now
+        cached_data.update(fundamentals)
+        joblib.dump({'data': cached_data, 'fetched_at': fetched_at, 'timestamp': now},
+                    FUNDAMENTALS_CACHE)
+        print(f"  ✓ Cached fundamentals for {len(cached_data)} symbols")
     except:
         pass
     
     return fundamentals
 
 
+def extract_fundamentals(info):
+    """Extract key fundamental metrics from a yfinance info dict"""
+    return {
+        # Valuation
+        'pe_ratio': info.get('trailingPE', np.nan),
+        'forward_pe': info.get('forwardPE', np.nan),
+        'pb_ratio': info.get('priceToBook', np.nan),
+        'ps_ratio': info.get('priceToSalesTrailing12Months', np.nan),
+        'peg_ratio': info.get('pegRatio', np.nan),
+        'ev_ebitda': info.get('enterpriseToEbitda', np.nan),
+        
+        # Profitability
+        'profit_margin': info.get('profitMargins', np.nan),
+        'operating_margin': info.get('operatingMargins', np.nan),
+        'gross_margin': info.get('grossMargins', np.nan),
+        'roe': info.get('returnOnEquity', np.nan),
+        'roa': info.get('returnOnAssets', np.nan),
+        
+        # Growth
+        'earnings_growth': info.get('earningsGrowth', np.nan),
+        'revenue_growth': info.get('revenueGrowth', np.nan),
+        'earnings_quarterly_growth': info.get('earningsQuarterlyGrowth', np.nan),
+        
+        # Financial Health
+        'debt_to_equity': info.get('debtToEquity', np.nan),
+        'current_ratio': info.get('currentRatio', np.nan),
+        'quick_ratio': info.get('quickRatio', np.nan),
+        
+        # Dividends
+        'dividend_yield': info.get('dividendYield', np.nan),
+        'payout_ratio': info.get('payoutRatio', np.nan),
+        
+        # Size
+        'market_cap': info.get('marketCap', np.nan),
+        'enterprise_value': info.get('enterpriseValue', np.nan),
+        
+        # Analyst
+        'target_mean_price': info.get('targetMeanPrice', np.nan),
+        'recommendation': info.get('recommendationMean', np.nan),  # 1=Buy, 5=Sell
+        
+        # Earnings
+        'trailing_eps': info.get('trailingEps', np.nan),
+        'forward_eps': info.get('forwardEps', np.nan),
+    }
+
+
 class AdvancedFeatureEngineer:
     """Advanced feature engineering with 60+ technical indicators"""
     
@@ -444,12 +483,12 @@ class AdvancedFeatureEngineer:
 
 
 def load_nifty50_stocks():
-    """Load Nifty 50 stocks"""
+    """Load Nifty 50 stocks as a list of per-symbol DataFrames"""
     stock_dir = os.path.join(DATA_DIR, 'archive 2')
     all_data = []
     
     if not os.path.exists(stock_dir):
-        return pd.DataFrame()
+        return all_data
     
     print("\n📈 Loading Nifty 50 Stocks...")
     for csv_file in glob.glob(os.path.join(stock_dir, '*.csv')):
@@ -474,25 +513,22 @@ def load_nifty50_stocks():
                 df['Symbol'] = symbol
                 df['AssetType'] = 'STOCK'
                 all_data.append(df)
-                print(f"  ✓ {symbol}: {len(df)} rows")
-                
+                log("  ✓ %s: %d rows", symbol, len(df))
+
         except Exception as e:
-            print(f"  ✗ Error: {e}")
-    
-    if all_data:
-        combined = pd.concat(all_data)
-        print(f"\n  Total: {len(combined)} rows from {len(all_data)} stocks")
-        return combined
-    return pd.DataFrame()
+            log("  ✗ Error: %s", e)
+
+    print(f"\n  Total: {sum(len(df) for df in all_data)} rows from {len(all_data)} stocks")
+    return all_data
 
 
 def load_etf_data():
-    """Load ETF datasets"""
+    """Load ETF datasets as a list of per-symbol DataFrames"""
     etf_dir = os.path.join(DATA_DIR, 'SIP_datasets')
     all_data = []
     
     if not os.path.exists(etf_dir):
-        return pd.DataFrame()
+        return all_data
     
     print("\n📈 Loading ETFs...")
     for csv_file in glob.glob(os.path.join(etf_dir, '*.csv')):
@@ -518,16 +554,13 @@ def load_etf_data():
                 df['Symbol'] = symbol
                 df['AssetType'] = 'ETF'
                 all_data.append(df)
-                print(f"  ✓ {symbol}: {len(df)} rows")
-                
+                log("  ✓ %s: %d rows", symbol, len(df))
+
         except Exception as e:
-            print(f"  ✗ Error: {e}")
-    
-    if all_data:
-        combined = pd.concat(all_data)
-        print(f"\n  Total: {len(combined)} rows from {len(all_data)} ETFs")
-        return combined
-    return pd.DataFrame()
+            log("  ✗ Error: %s", e)
+
+    print(f"\n  Total: {sum(len(df) for df in all_data)} rows from {len(all_data)} ETFs")
+    return all_data
 
 
 def train_advanced_model():
@@ -537,69 +570,98 @@ def train_advanced_model():
     print("="*70)
     print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     
-    # Load data
-    print("\n" + "="*70)
-    print("📊 LOADING DATA")
-    print("="*70)
-    
-    datasets = []
-    
-    stocks = load_nifty50_stocks()
-    if not stocks.empty:
-        datasets.append(stocks)
-    
-    etfs = load_etf_data()
-    if not etfs.empty:
-        datasets.append(etfs)
-    
-    if not datasets:
-        raise ValueError("No data!")
-    
-    raw_data = pd.concat(datasets)
-    print(f"\n📊 Combined: {len(raw_data)} rows")
-    
-    # Fetch fundamental data for all symbols
-    print("\n" + "="*70)
-    print("📈 FETCHING FUNDAMENTAL DATA")
-    print("="*70)
-    
-    all_symbols = raw_data['Symbol'].unique().tolist()
-    fundamentals = fetch_fundamental_data(all_symbols)
-    print(f"\n📊 Got fundamentals for {len([s for s in fundamentals if fundamentals[s]])} symbols")
-    
-    # Feature engineering
-    print("\n" + "="*70)
-    print("🔧 FEATURE ENGINEERING (72+ technical + 20+ fundamental features)")
-    print("="*70)
-    
-    processed = []
-    symbols = raw_data['Symbol'].unique()
-    
-    for symbol in symbols:
+    # Try the on-disk feature cache first - feature engineering over the
+    # full history is the slowest CPU stage and rarely changes between runs.
+    # A warm cache also skips the CSV parse and fundamentals fetch entirely.
+    all_data = None
+    n_symbols = 0
+    if os.path.exists(FEATURES_CACHE):
         try:
-            sym_data = raw_data[raw_data['Symbol'] == symbol].copy()
-            sym_data = sym_data.sort_index()
-            
-            if len(sym_data) < 100:
-                continue
-            
-            # Get fundamental data for this symbol
-            sym_fundamentals = fundamentals.get(symbol, {})
-            
-            featured = AdvancedFeatureEngineer.calculate_all_features(sym_data, sym_fundamentals)
-            # Only keep rows with valid target (drop last 10 rows where we can't compute future returns)
-            featured = featured.dropna(subset=['target'])
-            if len(featured) > 50:
-                processed.append(featured)
-                fund_count = len([k for k in featured.columns if k.startswith('fund_')])
-                print(f"  ✓ {symbol}: {len(featured)} rows, {fund_count} fundamental features")
-            
-        except Exception as e:
-            print(f"  ✗ {symbol}: {e}")
-    
-    print(f"\n✓ Processed {len(processed)} symbols")
-    
-    all_data = pd.concat(processed)
+            cache = joblib.load(FEATURES_CACHE)
+            cache_age = (datetime.now() - cache.get('timestamp', datetime.min)).days
+            if cache_age < 7:  # Use cache if less than 7 days old
+                all_data = cache['data']
+                n_symbols = cache.get('n_symbols', 0)
+                print(f"  ✓ Loaded {len(all_data)} feature rows from cache ({cache_age} days old)")
+        except:
+            pass
+
+    if all_data is None:
+        # Load data
+        print("\n" + "="*70)
+        print("📊 LOADING DATA")
+        print("="*70)
+
+        # Load both datasets concurrently instead of one after the other;
+        # wall time becomes max of the two instead of their sum
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            nifty_future = pool.submit(load_nifty50_stocks)
+            etf_future = pool.submit(load_etf_data)
+            frames = nifty_future.result() + etf_future.result()
+
+        if not frames:
+            raise ValueError("No data!")
+
+        print(f"\n📊 Combined: {sum(len(f) for f in frames)} rows")
+
+        # Fetch fundamental data for all symbols
+        print("\n" + "="*70)
+        print("📈 FETCHING FUNDAMENTAL DATA")
+        print("="*70)
+
+        # dict.fromkeys dedupes while keeping order, so no symbol is
+        # fetched from yfinance twice if it appears in several datasets
+        all_symbols = list(dict.fromkeys(f['Symbol'].iloc[0] for f in frames))
+        fundamentals = fetch_fundamental_data(all_symbols)
+        print(f"\n📊 Got fundamentals for {len([s for s in fundamentals if fundamentals[s]])} symbols")
+
+        # Feature engineering - stream one symbol at a time so the raw
+        # combined history never has to sit in RAM alongside the features
+        print("\n" + "="*70)
+        print("🔧 FEATURE ENGINEERING (72+ technical + 20+ fundamental features)")
+        print("="*70)
+
+        processed = []
+
+        while frames:
+            sym_data = frames.pop(0)
+            symbol = sym_data['Symbol'].iloc[0]
+            try:
+                sym_data = sym_data.sort_index()
+
+                if len(sym_data) < 100:
+                    continue
+
+                # Get fundamental data for this symbol
+                sym_fundamentals = fundamentals.get(symbol, {})
+
+                featured = AdvancedFeatureEngineer.calculate_all_features(sym_data, sym_fundamentals)
+                # Only keep rows with valid target (drop last 10 rows where we can't compute future returns)
+                featured = featured.dropna(subset=['target'])
+                if len(featured) > 50:
+                    processed.append(featured)
+                    fund_count = len([k for k in featured.columns if k.startswith('fund_')])
+                    log("  ✓ %s: %d rows, %d fundamental features", symbol, len(featured), fund_count)
+
+            except Exception as e:
+                log("  ✗ %s: %s", symbol, e)
+
+        print(f"\n✓ Processed {len(processed)} symbols")
+
+        all_data = pd.concat(processed)
+        n_symbols = len(processed)
+
+        # Downcast floats to float32 - halves the cache size (and training
+        # RAM) with no measurable effect on tree-based models
+        float_cols = all_data.select_dtypes(include=['float64']).columns
+        all_data[float_cols] = all_data[float_cols].astype(np.float32)
+
+        try:
+            joblib.dump({'data': all_data, 'n_symbols': n_symbols,
+                         'timestamp': datetime.now()}, FEATURES_CACHE, compress=3)
+            print(f"  ✓ Cached feature matrix ({len(all_data)} rows)")
+        except:
+            pass
 
     # --------------------------------------------------
     # RAG news features (default = no news during training)
@@ -644,20 +706,11 @@ def train_advanced_model():
     
     # Prepare - fill NaN per symbol with median, then drop remaining NaN
     print("\n🔧 Cleaning data...")
-    clean_parts = []
-    for sym in all_data['Symbol'].unique():
-        sym_df = all_data[all_data['Symbol'] == sym].copy()
-        sym_df = sym_df.dropna(subset=['target'])
-        # Fill feature NaN with median for that symbol
-        for col in feature_cols:
-            if col in sym_df.columns:
-                med = sym_df[col].median()
-                if pd.isna(med):
-                    med = 0  # fallback for all-NaN columns
-                sym_df[col] = sym_df[col].fillna(med)
-        clean_parts.append(sym_df)
-    
-    clean_data = pd.concat(clean_parts)
+    clean_data = all_data.dropna(subset=['target']).copy()
+    # Per-symbol medians in one grouped pass instead of a Python loop over
+    # every (symbol, column) pair; all-NaN columns fall back to 0
+    medians = clean_data.groupby('Symbol')[feature_cols].transform('median')
+    clean_data[feature_cols] = clean_data[feature_cols].fillna(medians).fillna(0)
     # Replace inf with NaN then fill
     clean_data = clean_data.replace([np.inf, -np.inf], np.nan)
     for col in feature_cols:
@@ -803,7 +856,8 @@ def train_advanced_model():
     print("  🚀 Adding HistGradientBoosting...")
     hgb = HistGradientBoostingClassifier(
         max_iter=500, learning_rate=0.05, max_depth=8,
-        min_samples_leaf=10, l2_regularization=0.1, random_state=42
+        min_samples_leaf=10, l2_regularization=0.1,
+        early_stopping=True, n_iter_no_change=20, random_state=42
     )
     models.append(('hgb', hgb))
     
@@ -833,8 +887,10 @@ def train_advanced_model():
     print("📈 EVALUATION")
     print("="*70)
     
-    y_pred = ensemble.predict(X_test_sel)
+    # One predict_proba pass - soft-voting predict() would re-run
+    # predict_proba on every member, doubling evaluation time
     y_proba = ensemble.predict_proba(X_test_sel)[:, 1]
+    y_pred = (y_proba >= 0.5).astype(int)
     
     accuracy = accuracy_score(y_test, y_pred)
     auc = roc_auc_score(y_test, y_proba)
@@ -891,11 +947,13 @@ def train_advanced_model():
             'n_features': len(top_features),
             'training_samples': len(X_train),
             'target': '5-day return >1%',
-            'symbols_trained': len(processed)
+            'symbols_trained': n_symbols
         }
     }
     
-    joblib.dump(model_data, MODEL_FILE)
+    # Protocol 5 enables out-of-band buffer pickling for the large NumPy
+    # arrays inside the ensemble; zlib-3 shrinks the file severalfold
+    joblib.dump(model_data, MODEL_FILE, compress=('zlib', 3), protocol=5)
     print(f"✅ Saved: {MODEL_FILE}")
     
     print("\n" + "="*70)